@@ -0,0 +1,331 @@
+import asyncio
+import threading
+from typing import Dict, Optional, Any, Set, Tuple
+
+from message_protocol import (
+    Message, ResponseMessage, MessageType, create_request, create_busy_response, BULK_OPERATIONS
+)
+from network_node_tcp import NetworkNodeTCP, NodeBusyError
+from wire_codec import Codec
+
+
+class AsyncNetworkNodeTCP(NetworkNodeTCP):
+    # Combine with a protocol node, e.g. class X(AsyncNetworkNodeTCP, ChordNetworkNode),
+    # so the protocol's _handle_request is served by the asyncio transport.
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[threading.Thread] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        
+        self.peer_streams: Dict[str, Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+        self.peer_pending: Dict[str, Set[str]] = {}
+        self.peer_locks: Dict[str, asyncio.Lock] = {}
+        self.async_pending: Dict[str, asyncio.Future] = {}
+        self.server_writers: Set[asyncio.StreamWriter] = set()
+    
+    def start(self):
+        if self.running:
+            return
+        
+        self.running = True
+        self.request_executor = self._create_request_executor()
+        self.forwarding_executor = self._create_forwarding_executor()
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.loop_thread.start()
+        
+        try:
+            asyncio.run_coroutine_threadsafe(self._start_server(), self.loop).result()
+        except Exception:
+            self.stop()
+            raise
+    
+    def stop(self):
+        if not self.running:
+            return
+        
+        self.running = False
+        
+        if self.loop and self.loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._stop_server(), self.loop).result(timeout=2.0)
+            except Exception:
+                pass
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        
+        if self.loop_thread and self.loop_thread.is_alive():
+            self.loop_thread.join(timeout=2.0)
+        
+        self._shutdown_executors()
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+    
+    async def _start_server(self):
+        self.server = await asyncio.start_server(
+            self._serve_connection,
+            self.listen_ip,
+            self.listen_port,
+            backlog=self.listen_backlog,
+            reuse_address=True
+        )
+    
+    async def _stop_server(self):
+        if self.server:
+            self.server.close()
+        
+        for target_address in list(self.peer_streams):
+            self._drop_peer(target_address)
+        
+        for writer in list(self.server_writers):
+            writer.close()
+        
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=1.0)
+    
+    async def _read_frame(self, reader: asyncio.StreamReader) -> Optional[Tuple[Message, Codec]]:
+        try:
+            length_data = await reader.readexactly(4)
+            message_length = int.from_bytes(length_data, byteorder='big')
+            if message_length == 0 or message_length > self.max_frame_size:
+                return None
+            message_data = await reader.readexactly(message_length)
+            return self._decode_frame_body(message_data)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+    
+    async def _write_frame(self, writer: asyncio.StreamWriter, message: Message, codec: Optional[Codec] = None,
+                           compress: Optional[bool] = None):
+        message_bytes = self._encode_frame(message, codec, compress)
+        writer.write(message_bytes)
+        await writer.drain()
+        
+        if self.metrics:
+            self.metrics.record_message_sent(
+                operation=message.msg_type.value if isinstance(message.msg_type, MessageType) else str(message.msg_type),
+                bytes_sent=len(message_bytes)
+            )
+    
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if len(self.server_writers) >= self.max_connections:
+            writer.close()
+            if self.metrics:
+                self.metrics.record_rejection(connection=True)
+            return
+        
+        self.server_writers.add(writer)
+        write_lock = asyncio.Lock()
+        
+        try:
+            while self.running:
+                frame = await self._read_frame(reader)
+                if frame is None:
+                    return
+                message, codec = frame
+                
+                if self.metrics:
+                    self.metrics.record_message_received(
+                        operation=message.msg_type.value if isinstance(message.msg_type, MessageType) else str(message.msg_type)
+                    )
+                
+                if message.msg_type in (MessageType.RESPONSE, MessageType.BUSY):
+                    self._resolve_response(message)
+                elif not self._admit_request():
+                    asyncio.create_task(self._reply_async(writer, write_lock, create_busy_response(message), codec))
+                else:
+                    asyncio.create_task(self._serve_request_async(writer, write_lock, message, codec))
+        
+        except (Exception, asyncio.CancelledError):
+            pass
+        
+        finally:
+            self.server_writers.discard(writer)
+            writer.close()
+    
+    async def _serve_request_async(self, writer: asyncio.StreamWriter, write_lock: asyncio.Lock, request: Message,
+                                   codec: Codec):
+        try:
+            response = await asyncio.wrap_future(
+                self._submit_admitted(request, self._process_admitted_request, request)
+            )
+        except (RuntimeError, asyncio.CancelledError):
+            return
+        await self._reply_async(writer, write_lock, response, codec, compress=request.msg_type in BULK_OPERATIONS)
+    
+    async def _reply_async(self, writer: asyncio.StreamWriter, write_lock: asyncio.Lock, response: ResponseMessage,
+                           codec: Codec, compress: bool = False):
+        try:
+            async with write_lock:
+                await self._write_frame(writer, response, codec, compress)
+        except (ConnectionError, RuntimeError, asyncio.CancelledError):
+            pass
+    
+    def _resolve_response(self, response: ResponseMessage):
+        future = self.async_pending.get(response.request_id)
+        if future is not None and not future.done():
+            future.set_result(response)
+    
+    async def _peer_stream(self, target_address: str) -> asyncio.StreamWriter:
+        stream = self.peer_streams.get(target_address)
+        if stream is not None and not stream[1].is_closing():
+            if self.metrics:
+                self.metrics.record_connection(reused=True)
+            return stream[1]
+        
+        lock = self.peer_locks.setdefault(target_address, asyncio.Lock())
+        async with lock:
+            stream = self.peer_streams.get(target_address)
+            if stream is not None and not stream[1].is_closing():
+                if self.metrics:
+                    self.metrics.record_connection(reused=True)
+                return stream[1]
+            
+            host, port = target_address.split(':')
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, int(port)),
+                timeout=self.timeout
+            )
+            if self.metrics:
+                self.metrics.record_connection(reused=False)
+            
+            self.peer_streams[target_address] = (reader, writer)
+            self.peer_pending.setdefault(target_address, set())
+            asyncio.create_task(self._read_responses(target_address, reader, writer))
+            return writer
+    
+    async def _read_responses(self, target_address: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        error = None
+        try:
+            while True:
+                frame = await self._read_frame(reader)
+                if frame is None:
+                    break
+                response = frame[0]
+                self.peer_pending.get(target_address, set()).discard(response.request_id)
+                self._resolve_response(response)
+        except Exception as e:
+            # A frame that does not decode leaves the stream out of step, so nothing after it can be trusted.
+            error = e
+        finally:
+            writer.close()
+            if self.peer_streams.get(target_address, (None, None))[1] is writer:
+                self._drop_peer(target_address, error)
+    
+    def _drop_peer(self, target_address: str, error: Optional[Exception] = None):
+        stream = self.peer_streams.pop(target_address, None)
+        if stream is not None:
+            stream[1].close()
+        
+        reason = f"Connection to {target_address} lost" + (f": {error}" if error is not None else "")
+        for request_id in self.peer_pending.pop(target_address, set()):
+            future = self.async_pending.get(request_id)
+            if future is not None and not future.done():
+                future.set_exception(ConnectionError(reason))
+    
+    async def send_request_async(
+        self,
+        target_address: str,
+        operation: MessageType,
+        *args,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        **kwargs
+    ) -> Any:
+        actual_timeout = timeout or self.timeout
+        actual_retries = retries if retries is not None else self.max_retries
+        
+        last_exception = None
+        
+        for attempt in range(actual_retries + 1):
+            request = create_request(
+                operation,
+                self.address,
+                target_address,
+                *args,
+                **kwargs
+            )
+            
+            future = asyncio.get_running_loop().create_future()
+            self.async_pending[request.request_id] = future
+            
+            if self.metrics:
+                self.metrics.start_request(request.request_id, operation.value)
+            
+            try:
+                writer = await self._peer_stream(target_address)
+                self.peer_pending.setdefault(target_address, set()).add(request.request_id)
+                try:
+                    await self._write_frame(writer, request)
+                except (ConnectionError, RuntimeError):
+                    self._drop_peer(target_address)
+                    raise
+                
+                try:
+                    response = await asyncio.wait_for(future, timeout=actual_timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"Request {request.request_id} to {target_address} timed out")
+                
+                if self.metrics:
+                    self.metrics.complete_request(
+                        request.request_id,
+                        operation.value,
+                        success=response.success
+                    )
+                
+                if response.msg_type == MessageType.BUSY:
+                    raise NodeBusyError(f"{target_address} is overloaded: {response.error}")
+                
+                if not response.success:
+                    raise Exception(f"Remote error: {response.error}")
+                
+                self.mark_node_alive(target_address)
+                return response.result
+            
+            except Exception as e:
+                last_exception = e
+                if attempt < actual_retries:
+                    await asyncio.sleep(self.retry_delay * (2 ** attempt))
+                elif not isinstance(e, NodeBusyError):
+                    self.mark_node_failed(target_address)
+            
+            finally:
+                self.async_pending.pop(request.request_id, None)
+                self.peer_pending.get(target_address, set()).discard(request.request_id)
+        
+        raise last_exception
+    
+    def send_request(
+        self,
+        target_address: str,
+        operation: MessageType,
+        *args,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        **kwargs
+    ) -> Any:
+        if not self.running:
+            raise RuntimeError(f"{self.address} is not running")
+        if threading.current_thread() is self.loop_thread:
+            raise RuntimeError("send_request would block the event loop; await send_request_async instead")
+        
+        return asyncio.run_coroutine_threadsafe(
+            self.send_request_async(
+                target_address,
+                operation,
+                *args,
+                timeout=timeout,
+                retries=retries,
+                **kwargs
+            ),
+            self.loop
+        ).result()
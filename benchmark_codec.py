@@ -0,0 +1,124 @@
+import time
+import json
+from message_protocol import MessageType, create_request, create_response
+from wire_codec import CODECS
+
+SENDER = "127.0.0.1:15000"
+RECEIVER = "127.0.0.1:15001"
+
+NODE_ID = (1 << 159) + 0x5f3a9c
+NODE_INFO = {'address': RECEIVER, 'id': NODE_ID, 'hex_id': format(NODE_ID, '040x')[:16], 'is_self': False}
+
+MOVIE = {
+    'id': 550,
+    'title': 'Fight Club',
+    'overview': 'A ticking-time-bomb insomniac and a slippery soap salesman channel primal male aggression '
+                'into a shocking new form of therapy.',
+    'popularity': 63.869,
+    'rating': 8.4,
+    'year': 1999,
+    'vote_count': 26280,
+    'runtime': 139.0,
+    'budget': 63000000,
+    'revenue': 100853753,
+    'genres': 'Drama',
+    'original_language': 'en'
+}
+
+MOVIE_BATCH = {f"{MOVIE['title']} {i}": dict(MOVIE, id=i) for i in range(50)}
+
+# (request args, response result) for each operation.
+SAMPLES = {
+    MessageType.FIND_SUCCESSOR: ((NODE_ID,), NODE_INFO),
+    MessageType.CLOSEST_PRECEDING_NODE: ((NODE_ID,), NODE_INFO),
+    MessageType.FIND_SUCCESSOR_STEP: ((NODE_ID,), {'done': False, 'node': NODE_INFO}),
+    MessageType.GET_PREDECESSOR: ((), NODE_INFO),
+    MessageType.GET_SUCCESSOR: ((), NODE_INFO),
+    MessageType.NOTIFY: ((NODE_INFO,), True),
+    MessageType.STABILIZE: ((), True),
+    MessageType.FIX_FINGERS: ((), True),
+    MessageType.UPDATE_FINGER_TABLE: ((NODE_INFO, 12), True),
+    MessageType.ROUTE: ((NODE_ID, 2, [NODE_ID - 1, NODE_ID - 2]), {'node': NODE_INFO, 'hops': 3}),
+    MessageType.ADD_NODE: ((NODE_INFO,), True),
+    MessageType.GET_LEAF_SET: ((), [NODE_INFO] * 16),
+    MessageType.UPDATE_ROUTING_TABLE: ((NODE_INFO,), True),
+    MessageType.INSERT: ((MOVIE['title'], MOVIE), True),
+    MessageType.LOOKUP: ((MOVIE['title'],), MOVIE),
+    MessageType.DELETE: ((MOVIE['title'],), True),
+    MessageType.UPDATE: ((MOVIE['title'], MOVIE), True),
+    MessageType.JOIN: ((NODE_INFO,), True),
+    MessageType.LEAVE: ((), True),
+    MessageType.TRANSFER_KEYS: ((MOVIE_BATCH,), True),
+    MessageType.GET_KEYS_FOR_RANGE: ((NODE_ID - 1000, NODE_ID), MOVIE_BATCH),
+    MessageType.PING: ((), 'pong'),
+    MessageType.GET_NODE_INFO: ((), NODE_INFO),
+    MessageType.GET_DATA: ((), MOVIE_BATCH),
+    MessageType.GET_SUCCESSOR_LIST: ((), [NODE_INFO] * 3),
+    MessageType.GET_REPLICAS: ((), MOVIE_BATCH),
+    MessageType.CHECK_PREDECESSOR: ((), True),
+    MessageType.RANGE_QUERY: (('year', 1990, 2000), {'results': [MOVIE] * 10}),
+    MessageType.DISTRIBUTED_RANGE_QUERY: (('year', 1990, 2000), [MOVIE] * 10),
+    MessageType.RELEASE_KEYS: ((list(MOVIE_BATCH),), len(MOVIE_BATCH)),
+    MessageType.FETCH_KEYS: ((list(MOVIE_BATCH),), MOVIE_BATCH),
+    MessageType.MULTI_INSERT: ((MOVIE_BATCH,), len(MOVIE_BATCH)),
+    MessageType.MULTI_LOOKUP: ((list(MOVIE_BATCH),), MOVIE_BATCH),
+    MessageType.MULTI_DELETE: ((list(MOVIE_BATCH),), len(MOVIE_BATCH)),
+}
+
+
+def measure(codec, message, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        data = codec.encode(message)
+    encode_us = (time.perf_counter() - start) / iterations * 1e6
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        codec.decode(data)
+    decode_us = (time.perf_counter() - start) / iterations * 1e6
+    
+    return len(data), encode_us, decode_us
+
+
+def run_codec_benchmark(iterations=2000):
+    print(f"\n{'='*86}")
+    print("CODEC MICRO-BENCHMARK (bytes per message, encode/decode microseconds)")
+    print(f"{'='*86}")
+    print(f"{'operation':<26}{'kind':<10}" + "".join(f"{name + ' B':>10}{'enc us':>9}{'dec us':>9}" for name in CODECS))
+    
+    results = []
+    for operation, (args, result) in SAMPLES.items():
+        request = create_request(operation, SENDER, RECEIVER, *args)
+        response = create_response(request, result=result)
+        
+        for kind, message in (('request', request), ('response', response)):
+            row = {'operation': operation.value, 'kind': kind}
+            for name, codec in CODECS.items():
+                size, encode_us, decode_us = measure(codec, message, iterations)
+                row[name] = {'bytes': size, 'encode_us': round(encode_us, 2), 'decode_us': round(decode_us, 2)}
+            results.append(row)
+            
+            print(f"{operation.value:<26}{kind:<10}" + "".join(
+                f"{row[name]['bytes']:>10}{row[name]['encode_us']:>9.2f}{row[name]['decode_us']:>9.2f}"
+                for name in CODECS
+            ))
+    
+    print("\n[+] Totals:")
+    for name in CODECS:
+        total_bytes = sum(row[name]['bytes'] for row in results)
+        total_us = sum(row[name]['encode_us'] + row[name]['decode_us'] for row in results)
+        print(f"    - {name:<8} {total_bytes:>9} bytes   {total_us:>9.1f} us encode+decode")
+    
+    return results
+
+
+def main():
+    results = run_codec_benchmark()
+    
+    with open('codec_benchmark_report.json', 'w') as f:
+        json.dump(results, f, indent=4)
+    print("\n[*] Codec report saved to codec_benchmark_report.json")
+
+
+if __name__ == "__main__":
+    main()
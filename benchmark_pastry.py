@@ -3,6 +3,7 @@ import random
 import statistics
 import csv
 from pastry_node import PastryNode
+from proximity import CoordinateLatencyModel
 from typing import List, Dict, Any
 
 class PastryBenchmark:
@@ -14,10 +15,11 @@ class PastryBenchmark:
         self.nodes: List[PastryNode] = []
         self.results: Dict[str, Any] = {}
         
-    def create_nodes(self, num_nodes: int) -> List[PastryNode]:
+    def create_nodes(self, num_nodes: int, latency_model: Any = None) -> List[PastryNode]:
         nodes = []
         for i in range(num_nodes):
-            node = PastryNode(f"192.168.1.{i}", 5000 + i, self.m_bits, self.b, self.l, self.m)
+            node = PastryNode(f"192.168.1.{i}", 5000 + i, self.m_bits, self.b, self.l, self.m,
+                              latency_model=latency_model)
             nodes.append(node)
         return nodes
     
@@ -199,6 +201,41 @@ class PastryBenchmark:
             'avg_per_lookup': statistics.mean(times) / num_lookups
         }
     
+    def benchmark_route_stretch(self, num_nodes: int, num_routes: int, proximity: bool,
+                                num_runs: int = 3) -> Dict[str, float]:
+        # Stretch is the summed RTT along the route divided by the direct RTT from source to destination.
+        latency_model = CoordinateLatencyModel()
+        stretches = []
+        route_latencies = []
+        
+        for run in range(num_runs):
+            nodes = self.create_nodes(num_nodes, latency_model if proximity else None)
+            
+            for i in range(1, num_nodes):
+                nodes[i].join(nodes[0])
+            
+            for _ in range(num_routes):
+                source = random.choice(nodes)
+                path = []
+                destination, _ = source.route(random.getrandbits(self.m_bits), path=path)
+                if destination is source:
+                    continue
+                if path[-1] != destination.address:
+                    path.append(destination.address)
+                
+                route_latency = sum(latency_model.rtt(a, b) for a, b in zip(path, path[1:]))
+                route_latencies.append(route_latency)
+                stretches.append(route_latency / latency_model.rtt(source.address, destination.address))
+        
+        return {
+            'mean': statistics.mean(stretches),
+            'median': statistics.median(stretches),
+            'stdev': statistics.stdev(stretches) if len(stretches) > 1 else 0,
+            'min': min(stretches),
+            'max': max(stretches),
+            'avg_route_latency': statistics.mean(route_latencies)
+        }
+    
     def run_all_benchmarks(self):
         all_results = []
         
@@ -307,6 +344,24 @@ class PastryBenchmark:
                 'avg_per_op': result['avg_per_lookup']
             })
         
+        print("\n7. ROUTE STRETCH BENCHMARK")
+        print("-" * 80)
+        for num_nodes in [50, 100]:
+            for proximity in (False, True):
+                result = self.benchmark_route_stretch(num_nodes, 500, proximity)
+                print(f"Nodes: {num_nodes:3d} | Proximity: {'on ' if proximity else 'off'} | "
+                      f"Mean: {result['mean']:.3f} | Median: {result['median']:.3f} | "
+                      f"StdDev: {result['stdev']:.3f} | Avg Route RTT: {result['avg_route_latency']:.2f}ms")
+                all_results.append({
+                    'operation': 'route_stretch_proximity' if proximity else 'route_stretch',
+                    'parameter': num_nodes,
+                    'mean': result['mean'],
+                    'median': result['median'],
+                    'stdev': result['stdev'],
+                    'min': result['min'],
+                    'max': result['max']
+                })
+        
         print("\n" + "=" * 80)
         print("BENCHMARK COMPLETE")
         print("=" * 80)
@@ -1,4 +1,10 @@
-from typing import Any, Optional, List, Tuple
+import os
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Any, Callable, Optional, List, Tuple, Dict, Iterable, Iterator
+
+DEFAULT_INDEXED_FIELDS = ('popularity', 'rating', 'year', 'vote_count', 'runtime', 'budget', 'revenue')
+
 
 class BPlusNode:
     def __init__(self, order: int, is_leaf: bool = False):
@@ -39,8 +45,37 @@ class BPlusNode:
             return new_node, mid_key
 
 
+class _MaxKey:
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return other is self
+
+    def __gt__(self, other):
+        return other is not self
+
+    def __ge__(self, other):
+        return True
+
+
+_MAX_KEY = _MaxKey()
+
+
+def _even_chunks(count: int, capacity: int) -> Iterator[Tuple[int, int]]:
+    groups = -(-count // capacity)
+    base, extra = divmod(count, groups)
+    start = 0
+    for g in range(groups):
+        end = start + base + (1 if g < extra else 0)
+        yield start, end
+        start = end
+
+
 class BPlusTree:
     def __init__(self, order: int = 10):
+        if order < 4:
+            raise ValueError(f"B+ tree order must be at least 4, got {order}")
         self.order = order
         self.root = BPlusNode(order, is_leaf=True)
         self._size = 0
@@ -48,46 +83,65 @@ class BPlusTree:
     def search(self, key: Any) -> Optional[Any]:
         node = self._find_leaf(key)
         
-        for i, k in enumerate(node.keys):
-            if k == key:
-                return node.values[i]
+        i = bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            return node.values[i]
         return None
 
     def _find_leaf(self, key: Any) -> BPlusNode:
         node = self.root
         
         while not node.is_leaf:
-            i = 0
-            while i < len(node.keys) and key >= node.keys[i]:
-                i += 1
-            node = node.children[i]
+            node = node.children[bisect_right(node.keys, key)]
         
         return node
 
+    def _find_leaf_with_path(self, key: Any) -> Tuple[BPlusNode, List[BPlusNode]]:
+        path = []
+        node = self.root
+        
+        while not node.is_leaf:
+            path.append(node)
+            node = node.children[bisect_right(node.keys, key)]
+        
+        return node, path
+
     def insert(self, key: Any, value: Any):
-        node = self._find_leaf(key)
+        node, path = self._find_leaf_with_path(key)
         
         self._insert_into_leaf(node, key, value)
         self._size += 1
         
         if node.is_full():
-            self._split_and_propagate(node)
+            self._split_and_propagate(node, path)
 
-    def _insert_into_leaf(self, node: BPlusNode, key: Any, value: Any):
-        i = 0
-        while i < len(node.keys) and key > node.keys[i]:
-            i += 1
+    def upsert(self, key: Any, value: Any) -> bool:
+        node, path = self._find_leaf_with_path(key)
+        
+        i = bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            node.values[i] = value
+            return False
         
         node.keys.insert(i, key)
         node.values.insert(i, value)
+        self._size += 1
+        
+        if node.is_full():
+            self._split_and_propagate(node, path)
+        return True
 
-    def _split_and_propagate(self, node: BPlusNode):
-        path = self._find_path(node)
+    def _insert_into_leaf(self, node: BPlusNode, key: Any, value: Any):
+        i = bisect_left(node.keys, key)
         
+        node.keys.insert(i, key)
+        node.values.insert(i, value)
+
+    def _split_and_propagate(self, node: BPlusNode, path: List[BPlusNode]):
         while node.is_full():
             new_node, mid_key = node.split()
             
-            if node == self.root:
+            if node is self.root:
                 new_root = BPlusNode(self.order, is_leaf=False)
                 new_root.keys = [mid_key]
                 new_root.children = [node, new_node]
@@ -98,55 +152,204 @@ class BPlusTree:
             self._insert_into_parent(parent, mid_key, new_node)
             node = parent
 
-    def _find_path(self, target: BPlusNode) -> List[BPlusNode]:
-        path = []
-        node = self.root
-        
-        while node != target:
-            path.append(node)
-            if node.is_leaf:
-                break
-            
-            key = target.keys[0] if target.keys else 0
-            i = 0
-            while i < len(node.keys) and key >= node.keys[i]:
-                i += 1
-            node = node.children[i]
-        
-        return path
-
     def _insert_into_parent(self, parent: BPlusNode, key: Any, child: BPlusNode):
-        i = 0
-        while i < len(parent.keys) and key > parent.keys[i]:
-            i += 1
+        i = bisect_left(parent.keys, key)
         
         parent.keys.insert(i, key)
         parent.children.insert(i + 1, child)
 
     def delete(self, key: Any) -> bool:
-        node = self._find_leaf(key)
+        node, path = self._find_leaf_with_path(key)
         
-        for i, k in enumerate(node.keys):
-            if k == key:
-                node.keys.pop(i)
-                node.values.pop(i)
-                self._size -= 1
-                return True
+        i = bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            node.keys.pop(i)
+            node.values.pop(i)
+            self._size -= 1
+            self._rebalance(node, path, key)
+            return True
         return False
 
-    def range_query(self, start_key: Any, end_key: Any) -> List[Any]:
-        results = []
-        node = self._find_leaf(start_key)
+    def _min_keys(self, node: BPlusNode) -> int:
+        if node.is_leaf:
+            return (self.order - 1) // 2
+        return (self.order - 2) // 2
+
+    def _rebalance(self, node: BPlusNode, path: List[BPlusNode], key: Any):
+        while path and len(node.keys) < self._min_keys(node):
+            parent = path.pop()
+            idx = bisect_right(parent.keys, key)
+            left = parent.children[idx - 1] if idx > 0 else None
+            right = parent.children[idx + 1] if idx + 1 < len(parent.children) else None
+            
+            if left is not None and len(left.keys) > self._min_keys(left):
+                self._borrow_from_left(parent, idx)
+                return
+            if right is not None and len(right.keys) > self._min_keys(right):
+                self._borrow_from_right(parent, idx)
+                return
+            
+            if left is not None:
+                self._merge_children(parent, idx - 1)
+            elif right is not None:
+                self._merge_children(parent, idx)
+            else:
+                return
+            node = parent
+        
+        while not self.root.is_leaf and len(self.root.children) == 1:
+            self.root = self.root.children[0]
+
+    def _borrow_from_left(self, parent: BPlusNode, idx: int):
+        node = parent.children[idx]
+        left = parent.children[idx - 1]
+        
+        if node.is_leaf:
+            node.keys.insert(0, left.keys.pop())
+            node.values.insert(0, left.values.pop())
+            parent.keys[idx - 1] = node.keys[0]
+        else:
+            node.keys.insert(0, parent.keys[idx - 1])
+            node.children.insert(0, left.children.pop())
+            parent.keys[idx - 1] = left.keys.pop()
+
+    def _borrow_from_right(self, parent: BPlusNode, idx: int):
+        node = parent.children[idx]
+        right = parent.children[idx + 1]
+        
+        if node.is_leaf:
+            node.keys.append(right.keys.pop(0))
+            node.values.append(right.values.pop(0))
+            parent.keys[idx] = right.keys[0]
+        else:
+            node.keys.append(parent.keys[idx])
+            node.children.append(right.children.pop(0))
+            parent.keys[idx] = right.keys.pop(0)
+
+    def _merge_children(self, parent: BPlusNode, idx: int):
+        left = parent.children[idx]
+        right = parent.children[idx + 1]
+        
+        if left.is_leaf:
+            left.keys.extend(right.keys)
+            left.values.extend(right.values)
+            left.next_leaf = right.next_leaf
+        else:
+            left.keys.append(parent.keys[idx])
+            left.keys.extend(right.keys)
+            left.children.extend(right.children)
+        
+        parent.keys.pop(idx)
+        parent.children.pop(idx + 1)
+
+    def compact(self, fill_factor: float = 1.0):
+        rebuilt = BPlusTree.from_sorted(self.items(), order=self.order, fill_factor=fill_factor)
+        self.root = rebuilt.root
+        self._size = rebuilt._size
+
+    def stats(self) -> dict:
+        height = 1
+        node = self.root
+        while not node.is_leaf:
+            node = node.children[0]
+            height += 1
+        
+        leaf_count = 0
+        node = self._get_leftmost_leaf()
+        while node:
+            leaf_count += 1
+            node = node.next_leaf
+        
+        capacity = leaf_count * (self.order - 2)
+        return {
+            'size': self._size,
+            'height': height,
+            'leaf_count': leaf_count,
+            'fill_factor': self._size / capacity if capacity else 0.0
+        }
+
+    def range_query(self, start_key: Any, end_key: Any, limit: Optional[int] = None,
+                    offset: int = 0) -> List[Any]:
+        return [v for _, v in self.iter_items(start_key, end_key, limit=limit, offset=offset)]
+
+    def iter_items(self, start: Any = None, end: Any = None, reverse: bool = False,
+                   limit: Optional[int] = None, offset: int = 0) -> Iterator[Tuple[Any, Any]]:
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("limit and offset must be non-negative")
+        
+        items = self._iter_reverse(start, end) if reverse else self._iter_forward(start, end)
+        return islice(items, offset, None if limit is None else offset + limit)
+
+    def iter_keys(self, start: Any = None, end: Any = None, reverse: bool = False,
+                  limit: Optional[int] = None, offset: int = 0) -> Iterator[Any]:
+        return (k for k, _ in self.iter_items(start, end, reverse, limit, offset))
+
+    def iter_values(self, start: Any = None, end: Any = None, reverse: bool = False,
+                    limit: Optional[int] = None, offset: int = 0) -> Iterator[Any]:
+        return (v for _, v in self.iter_items(start, end, reverse, limit, offset))
+
+    def read_chunk(self, cursor: Any = None, limit: int = 1000) -> Tuple[List[Tuple[Any, Any]], Any]:
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        
+        items = []
+        for key, value in self._iter_forward(cursor, None):
+            if cursor is not None and key == cursor:
+                continue
+            items.append((key, value))
+            if len(items) == limit:
+                return items, key
+        return items, None
+
+    def _iter_forward(self, start: Any, end: Any) -> Iterator[Tuple[Any, Any]]:
+        if start is None:
+            node = self._get_leftmost_leaf()
+            i = 0
+        else:
+            node = self._find_leaf(start)
+            i = bisect_left(node.keys, start)
         
         while node:
-            for i, key in enumerate(node.keys):
-                if start_key <= key <= end_key:
-                    results.append(node.values[i])
-                elif key > end_key:
-                    return results
+            keys = node.keys
+            values = node.values
+            stop = len(keys) if end is None else bisect_right(keys, end)
+            for j in range(i, stop):
+                yield keys[j], values[j]
+            if stop < len(keys):
+                return
             node = node.next_leaf
+            i = 0
+
+    def _iter_reverse(self, start: Any, end: Any) -> Iterator[Tuple[Any, Any]]:
+        stack = []
+        node = self.root
+        while not node.is_leaf:
+            idx = len(node.keys) if end is None else bisect_right(node.keys, end)
+            stack.append((node, idx))
+            node = node.children[idx]
         
-        return results
+        hi = len(node.keys) if end is None else bisect_right(node.keys, end)
+        while True:
+            keys = node.keys
+            values = node.values
+            lo = 0 if start is None else bisect_left(keys, start)
+            for j in range(hi - 1, lo - 1, -1):
+                yield keys[j], values[j]
+            if lo > 0:
+                return
+            
+            while stack and stack[-1][1] == 0:
+                stack.pop()
+            if not stack:
+                return
+            
+            parent, idx = stack.pop()
+            stack.append((parent, idx - 1))
+            node = parent.children[idx - 1]
+            while not node.is_leaf:
+                stack.append((node, len(node.keys)))
+                node = node.children[-1]
+            hi = len(node.keys)
 
     def get(self, key: Any, default=None) -> Any:
         result = self.search(key)
@@ -189,6 +392,81 @@ class BPlusTree:
             node = node.children[0]
         return node
 
+    @classmethod
+    def from_sorted(cls, sorted_items: Iterable[Tuple[Any, Any]], order: int = 10,
+                    fill_factor: float = 1.0) -> 'BPlusTree':
+        tree = cls(order)
+        tree.bulk_load(sorted_items, fill_factor=fill_factor)
+        return tree
+
+    def bulk_load(self, sorted_items: Iterable[Tuple[Any, Any]], fill_factor: float = 1.0):
+        if not 0 < fill_factor <= 1:
+            raise ValueError(f"fill_factor must be in (0, 1], got {fill_factor}")
+        
+        items = list(sorted_items)
+        for i in range(1, len(items)):
+            if not items[i - 1][0] < items[i][0]:
+                raise ValueError("bulk_load requires keys in strictly ascending order")
+        
+        if self._size:
+            items = self._merge_items(self.items(), items)
+        
+        if not items:
+            self.clear()
+            return
+        
+        keys = [k for k, _ in items]
+        values = [v for _, v in items]
+        
+        leaf_capacity = max(1, int((self.order - 2) * fill_factor))
+        level = []
+        low_keys = []
+        prev_leaf = None
+        for start, end in _even_chunks(len(items), leaf_capacity):
+            leaf = BPlusNode(self.order, is_leaf=True)
+            leaf.keys = keys[start:end]
+            leaf.values = values[start:end]
+            if prev_leaf is not None:
+                prev_leaf.next_leaf = leaf
+            prev_leaf = leaf
+            level.append(leaf)
+            low_keys.append(leaf.keys[0])
+        
+        fanout = max(2, int((self.order - 1) * fill_factor))
+        while len(level) > 1:
+            parents = []
+            parent_low_keys = []
+            for start, end in _even_chunks(len(level), fanout):
+                parent = BPlusNode(self.order, is_leaf=False)
+                parent.children = level[start:end]
+                parent.keys = low_keys[start + 1:end]
+                parents.append(parent)
+                parent_low_keys.append(low_keys[start])
+            level = parents
+            low_keys = parent_low_keys
+        
+        self.root = level[0]
+        self._size = len(items)
+
+    @staticmethod
+    def _merge_items(existing: List[Tuple[Any, Any]], incoming: List[Tuple[Any, Any]]) -> List[Tuple[Any, Any]]:
+        merged = []
+        i = j = 0
+        while i < len(existing) and j < len(incoming):
+            if existing[i][0] < incoming[j][0]:
+                merged.append(existing[i])
+                i += 1
+            elif incoming[j][0] < existing[i][0]:
+                merged.append(incoming[j])
+                j += 1
+            else:
+                merged.append(incoming[j])
+                i += 1
+                j += 1
+        merged.extend(existing[i:])
+        merged.extend(incoming[j:])
+        return merged
+
     def clear(self):
         self.root = BPlusNode(self.order, is_leaf=True)
         self._size = 0
@@ -202,11 +480,8 @@ class BPlusTree:
             raise KeyError(key)
         return result
 
-    def __setitem__(self, key: Any, value: Any):
-        existing = self.search(key)
-        if existing is not None:
-            self.delete(key)
-        self.insert(key, value)
+    def __setitem__(self, key: Any, value: Any) -> bool:
+        return self.upsert(key, value)
 
     def __delitem__(self, key: Any):
         if not self.delete(key):
@@ -216,4 +491,194 @@ class BPlusTree:
         return self.search(key) is not None
 
     def __iter__(self):
-        return iter(self.keys())
+        return self.iter_keys()
+
+
+
+class IndexedBPlusTree(BPlusTree):
+    def __init__(self, order: int = 10, indexed_fields: Iterable[str] = DEFAULT_INDEXED_FIELDS,
+                 key_hasher: Optional[Callable[[Any], int]] = None):
+        super().__init__(order)
+        self.indexed_fields = tuple(indexed_fields)
+        self.indexes: Dict[str, BPlusTree] = {field: BPlusTree(order) for field in self.indexed_fields}
+        self.key_hasher = key_hasher
+        self.ring_index: Optional[BPlusTree] = BPlusTree(order) if key_hasher is not None else None
+        # Every write stamps the record with the next value of a clock seeded with a random epoch, so
+        # a version is never reused by this store, even across a restart.
+        self.versions: Dict[Any, int] = {}
+        self._version_clock = int.from_bytes(os.urandom(4), 'big') << 32
+
+    @staticmethod
+    def _index_value(record: Any, field: str) -> Optional[Any]:
+        if not isinstance(record, dict):
+            return None
+        value = record.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+            return value
+        return None
+
+    def _index_record(self, key: Any, record: Any):
+        for field, index in self.indexes.items():
+            value = self._index_value(record, field)
+            if value is not None:
+                index.upsert((value, key), record)
+
+    def _unindex_record(self, key: Any, record: Any):
+        for field, index in self.indexes.items():
+            value = self._index_value(record, field)
+            if value is not None:
+                index.delete((value, key))
+
+    def _find_existing(self, key: Any) -> Tuple[bool, Any]:
+        node = self._find_leaf(key)
+        i = bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            return True, node.values[i]
+        return False, None
+
+    def _stamp(self, key: Any):
+        self._version_clock += 1
+        self.versions[key] = self._version_clock
+
+    def record_version(self, key: Any) -> Optional[int]:
+        return self.versions.get(key)
+
+    def fetch_versioned(self, keys: Iterable[Any], known: Optional[Dict[Any, int]] = None) -> Dict[Any, Optional[Tuple[Any, int]]]:
+        # Keys whose version still equals known[key] are left out; keys not stored map to None.
+        known = known or {}
+        result = {}
+        for key in keys:
+            version = self.versions.get(key)
+            if version is not None and known.get(key) == version:
+                continue
+            result[key] = (self.search(key), version) if version is not None else None
+        return result
+
+    def _secondary_trees(self) -> List[BPlusTree]:
+        trees = list(self.indexes.values())
+        if self.ring_index is not None:
+            trees.append(self.ring_index)
+        return trees
+
+    def insert(self, key: Any, value: Any):
+        super().insert(key, value)
+        self._stamp(key)
+        self._index_record(key, value)
+        if self.ring_index is not None:
+            self.ring_index.upsert((self.key_hasher(key), key), value)
+
+    def upsert(self, key: Any, value: Any) -> bool:
+        found, old = self._find_existing(key)
+        if found:
+            self._unindex_record(key, old)
+        is_new = super().upsert(key, value)
+        self._stamp(key)
+        self._index_record(key, value)
+        if self.ring_index is not None:
+            self.ring_index.upsert((self.key_hasher(key), key), value)
+        return is_new
+
+    def delete(self, key: Any) -> bool:
+        found, old = self._find_existing(key)
+        if not found:
+            return False
+        super().delete(key)
+        self.versions.pop(key, None)
+        self._unindex_record(key, old)
+        if self.ring_index is not None:
+            self.ring_index.delete((self.key_hasher(key), key))
+        return True
+
+    def bulk_load(self, sorted_items: Iterable[Tuple[Any, Any]], fill_factor: float = 1.0):
+        items = list(sorted_items)
+        was_empty = self._size == 0
+        replaced = []
+        if not was_empty:
+            for key, _ in items:
+                found, old = self._find_existing(key)
+                if found:
+                    replaced.append((key, old))
+        
+        super().bulk_load(items, fill_factor)
+        for key, _ in items:
+            self._stamp(key)
+        
+        for key, old in replaced:
+            self._unindex_record(key, old)
+        
+        for field, index in self.indexes.items():
+            entries = []
+            for key, record in items:
+                value = self._index_value(record, field)
+                if value is not None:
+                    entries.append(((value, key), record))
+            entries.sort(key=lambda entry: entry[0])
+            if was_empty:
+                index.bulk_load(entries, fill_factor)
+            else:
+                for entry_key, record in entries:
+                    index.upsert(entry_key, record)
+        
+        if self.ring_index is not None:
+            entries = sorted((((self.key_hasher(key), key), value) for key, value in items),
+                             key=lambda entry: entry[0])
+            if was_empty:
+                self.ring_index.bulk_load(entries, fill_factor)
+            else:
+                for entry_key, value in entries:
+                    self.ring_index.upsert(entry_key, value)
+
+    def clear(self):
+        super().clear()
+        self.versions.clear()
+        for tree in self._secondary_trees():
+            tree.clear()
+
+    def compact(self, fill_factor: float = 1.0):
+        super().compact(fill_factor)
+        for tree in self._secondary_trees():
+            tree.compact(fill_factor)
+
+    def iter_attribute_range(self, field: str, min_val: Any = None, max_val: Any = None,
+                             reverse: bool = False, limit: Optional[int] = None,
+                             offset: int = 0) -> Iterator[Any]:
+        start = None if min_val is None else (min_val,)
+        end = None if max_val is None else (max_val, _MAX_KEY)
+        return self.indexes[field].iter_values(start, end, reverse, limit, offset)
+
+    def iter_ring_range(self, start_id: Optional[int] = None, end_id: Optional[int] = None,
+                        after: Optional[Tuple[int, Any]] = None) -> Iterator[Tuple[int, Any, Any]]:
+        if self.ring_index is None:
+            raise ValueError("iter_ring_range requires a tree built with key_hasher")
+        
+        if start_id is None or end_id is None or start_id == end_id:
+            segments = [(None, None)]
+        elif start_id < end_id:
+            segments = [((start_id + 1,), (end_id, _MAX_KEY))]
+        else:
+            segments = [((start_id + 1,), None), (None, (end_id, _MAX_KEY))]
+        
+        for start, end in segments:
+            if after is not None:
+                if (start is not None and after < start) or (end is not None and after > end):
+                    continue
+                start, skip, after = after, after, None
+            else:
+                skip = None
+            for (ring_id, key), value in self.ring_index.iter_items(start, end):
+                if skip is not None and (ring_id, key) == skip:
+                    continue
+                yield ring_id, key, value
+    
+    def read_ring_chunk(self, start_id: Optional[int] = None, end_id: Optional[int] = None,
+                        cursor: Optional[Tuple[int, Any]] = None,
+                        limit: int = 1000) -> Tuple[List[Tuple[Any, Any]], Optional[Tuple[int, Any]]]:
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        
+        items = []
+        for ring_id, key, value in self.iter_ring_range(start_id, end_id, after=cursor):
+            items.append((key, value))
+            if len(items) == limit:
+                return items, (ring_id, key)
+        return items, None
@@ -17,24 +17,8 @@ class ChordHopAnalyzer:
         return nodes
     
     def count_hops(self, start_node: ChordNode, key: str) -> int:
-        hops = 0
         key_id = start_node.hasher.hash_key(key)
-        current = start_node
-        
-        while True:
-            if start_node.hasher.in_range(key_id, current.id, current.successor.id, 
-                                         inclusive_start=False, inclusive_end=True):
-                hops += 1
-                break
-            
-            next_node = current.closest_preceding_node(key_id)
-            if next_node is current:
-                hops += 1
-                break
-            
-            current = next_node
-            hops += 1
-            
+        _, hops, _ = start_node.find_successor_route(key_id)
         return hops
     
     def measure_hops(self, num_nodes: int, num_keys: int, num_lookups: int) -> Dict:
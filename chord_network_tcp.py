@@ -1,7 +1,8 @@
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterable, Iterator, List, Tuple
 
 from chord_node import ChordNode
 from network_node_tcp import NetworkNodeTCP
+from async_network_node_tcp import AsyncNetworkNodeTCP
 from message_protocol import (
     Message, RequestMessage, ResponseMessage, MessageType,
     create_response
@@ -15,16 +16,29 @@ class ChordNetworkNode(NetworkNodeTCP):
         port: int = 5000,
         m_bits: int = 160,
         timeout: float = 5.0,
-        enable_metrics: bool = True
+        enable_metrics: bool = True,
+        tree_order: int = 10,
+        codec: str = "json",
+        compression: Optional[str] = None,
+        lookup_cache_size: int = 0,
+        lookup_cache_ttl: Optional[float] = 30.0,
+        lookup_cache_policy: str = "lru",
+        lookup_cache_fresh_for: float = 0.0
     ):
-        chord_node = ChordNode(ip=ip, port=port, m_bits=m_bits)
+        chord_node = ChordNode(ip=ip, port=port, m_bits=m_bits, tree_order=tree_order)
         
         super().__init__(
             dht_node=chord_node,
             listen_ip=ip,
             listen_port=port,
             timeout=timeout,
-            enable_metrics=enable_metrics
+            enable_metrics=enable_metrics,
+            codec=codec,
+            compression=compression,
+            lookup_cache_size=lookup_cache_size,
+            lookup_cache_ttl=lookup_cache_ttl,
+            lookup_cache_policy=lookup_cache_policy,
+            lookup_cache_fresh_for=lookup_cache_fresh_for
         )
         
         self.chord_node: ChordNode = chord_node
@@ -49,6 +63,12 @@ class ChordNetworkNode(NetworkNodeTCP):
                 result = self._serialize_node(result_node)
                 return create_response(request, result=result, success=True)
             
+            elif operation == MessageType.FIND_SUCCESSOR_STEP:
+                node_id = args[0] if args else kwargs.get('id')
+                done, result_node = self.chord_node.find_successor_step(node_id)
+                result = {'done': done, 'node': self._serialize_node(result_node)}
+                return create_response(request, result=result, success=True)
+            
             elif operation == MessageType.CLOSEST_PRECEDING_NODE:
                 node_id = args[0] if args else kwargs.get('id')
                 result_node = self.chord_node.closest_preceding_node(node_id)
@@ -70,16 +90,36 @@ class ChordNetworkNode(NetworkNodeTCP):
                 key = args[0] if args else kwargs.get('key')
                 value = args[1] if len(args) > 1 else kwargs.get('value')
                 result = self.chord_node.insert(key, value)
+                self._invalidate_cached([key])
                 return create_response(request, result=result, success=True)
             
             elif operation == MessageType.LOOKUP:
                 key = args[0] if args else kwargs.get('key')
-                result = self.chord_node.lookup(key)
+                result = self._cached_lookup(key, self.chord_node.lookup, self.chord_node.group_by_owner)
                 return create_response(request, result=result, success=True)
             
             elif operation == MessageType.DELETE:
                 key = args[0] if args else kwargs.get('key')
                 result = self.chord_node.delete(key)
+                self._invalidate_cached([key])
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.MULTI_INSERT:
+                items = args[0] if args else kwargs.get('items')
+                items = dict(items)
+                result = self.chord_node.multi_insert(items.items())
+                self._invalidate_cached(items)
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.MULTI_LOOKUP:
+                keys = args[0] if args else kwargs.get('keys')
+                result = self._cached_multi_lookup(keys, self.chord_node.multi_lookup, self.chord_node.group_by_owner)
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.MULTI_DELETE:
+                keys = args[0] if args else kwargs.get('keys')
+                result = self.chord_node.multi_delete(keys)
+                self._invalidate_cached(keys)
                 return create_response(request, result=result, success=True)
             
             elif operation == MessageType.GET_NODE_INFO:
@@ -91,17 +131,42 @@ class ChordNetworkNode(NetworkNodeTCP):
                 return create_response(request, result=result, success=True)
             
             elif operation == MessageType.GET_DATA:
-                return create_response(request, result=dict(self.chord_node.data), success=True)
+                if 'limit' in kwargs:
+                    items, cursor = self.chord_node.read_chunk(cursor=kwargs.get('cursor'), limit=kwargs['limit'])
+                    return create_response(request, result={'items': items, 'cursor': cursor}, success=True)
+                return create_response(request, result=dict(self.chord_node.data.iter_items()), success=True)
             
             elif operation == MessageType.TRANSFER_KEYS:
                 keys_data = args[0] if args else kwargs.get('keys_data')
-                for key, value in keys_data.items():
-                    self.chord_node.data[key] = value
+                keys_data = dict(keys_data)
+                self.chord_node.accept_keys(keys_data.items())
+                self._invalidate_cached(keys_data)
                 return create_response(request, result=True, success=True)
             
+            elif operation == MessageType.RELEASE_KEYS:
+                keys = args[0] if args else kwargs.get('keys')
+                result = self.chord_node.release_keys(keys)
+                self._invalidate_cached(keys)
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.FETCH_KEYS:
+                keys = args[0] if args else kwargs.get('keys')
+                return create_response(request, result=self.chord_node.fetch_keys(keys), success=True)
+            
+            elif operation == MessageType.FETCH_VERSIONED:
+                keys = args[0] if args else kwargs.get('keys')
+                known = args[1] if len(args) > 1 else kwargs.get('known')
+                return create_response(request, result=self.chord_node.fetch_versioned(keys, known), success=True)
+            
             elif operation == MessageType.GET_KEYS_FOR_RANGE:
                 start_id = args[0] if args else kwargs.get('start_id')
                 end_id = args[1] if len(args) > 1 else kwargs.get('end_id')
+                if 'limit' in kwargs:
+                    cursor = kwargs.get('cursor')
+                    items, cursor = self.chord_node.read_chunk(
+                        start_id, end_id, tuple(cursor) if cursor else None, kwargs['limit']
+                    )
+                    return create_response(request, result={'items': items, 'cursor': cursor}, success=True)
                 result = self.chord_node._get_keys_for_range(start_id, end_id)
                 return create_response(request, result=result, success=True)
             
@@ -120,6 +185,15 @@ class ChordNetworkNode(NetworkNodeTCP):
                 key = args[0] if args else kwargs.get('key')
                 value = args[1] if len(args) > 1 else kwargs.get('value')
                 result = self.chord_node.update(key, value)
+                self._invalidate_cached([key])
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.RANGE_QUERY:
+                result = self.chord_node.local_range_query_sorted(*args, **kwargs)
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.DISTRIBUTED_RANGE_QUERY:
+                result = self.chord_node.distributed_range_query(*args, **kwargs)
                 return create_response(request, result=result, success=True)
             
             else:
@@ -139,7 +213,7 @@ class ChordNetworkNode(NetworkNodeTCP):
         return {
             'address': node.address,
             'id': node.id,
-            'hex_id': node.hasher.get_hex_id(node.id)[:16],
+            'hex_id': self.chord_node.hasher.get_hex_id(node.id)[:16],
             'is_self': (node is self.chord_node)
         }
     
@@ -155,10 +229,28 @@ class ChordNetworkNode(NetworkNodeTCP):
     def update(self, key: str, value: Any) -> bool:
         return self.chord_node.update(key, value)
     
+    def multi_insert(self, items) -> int:
+        return self.chord_node.multi_insert(items)
+    
+    def multi_lookup(self, keys: Iterable[str]) -> Dict[str, Any]:
+        return self.chord_node.multi_lookup(keys)
+    
+    def multi_delete(self, keys: Iterable[str]) -> int:
+        return self.chord_node.multi_delete(keys)
+    
+    def distributed_range_query(self, attr_name: str, min_val, max_val, limit: Optional[int] = None,
+                                order_by: Optional[str] = None) -> List[Any]:
+        return self.chord_node.distributed_range_query(attr_name, min_val, max_val, limit=limit, order_by=order_by)
+    
     def __repr__(self):
         return f"<ChordNetworkNode {self.address} ID:{self.chord_node.hasher.get_hex_id(self.chord_node.id)[:8]}...>"
 
 
+class AsyncChordNetworkNode(AsyncNetworkNodeTCP, ChordNetworkNode):
+    def __repr__(self):
+        return f"<AsyncChordNetworkNode {self.address} ID:{self.chord_node.hasher.get_hex_id(self.chord_node.id)[:8]}...>"
+
+
 class RemoteChordNode:
     def __init__(self, address: str, local_node: ChordNetworkNode):
         self.address = address
@@ -201,6 +293,18 @@ class RemoteChordNode:
         
         return self.local_node.get_remote_node(result['address'])
     
+    def find_successor_step(self, node_id: int) -> Tuple[bool, 'RemoteChordNode']:
+        result = self.local_node.send_request(
+            self.address,
+            MessageType.FIND_SUCCESSOR_STEP,
+            node_id
+        )
+        
+        node = result['node']
+        if node is None or node.get('is_self'):
+            return result['done'], self
+        return result['done'], self.local_node.get_remote_node(node['address'])
+    
     def closest_preceding_node(self, node_id: int) -> 'RemoteChordNode':
         result = self.local_node.send_request(
             self.address,
@@ -244,5 +348,85 @@ class RemoteChordNode:
             {'address': node.address, 'id': node.id}
         )
     
+    def hand_off_chunks(self, start_id: Optional[int] = None, end_id: Optional[int] = None,
+                        chunk_size: int = 1000) -> Iterator[List[Tuple[Any, Any]]]:
+        if start_id is None or end_id is None:
+            chunks = self.local_node.stream_chunks(self.address, MessageType.GET_DATA, chunk_size=chunk_size)
+        else:
+            chunks = self.local_node.stream_chunks(
+                self.address, MessageType.GET_KEYS_FOR_RANGE, start_id, end_id, chunk_size=chunk_size
+            )
+        for items, _ in chunks:
+            if items:
+                yield items
+    
+    def accept_keys(self, items: Iterable[Tuple[Any, Any]]):
+        for _ in self.local_node.push_chunks(self.address, items):
+            pass
+    
+    def release_keys(self, keys: Iterable[Any]) -> int:
+        return self.local_node.send_request(
+            self.address,
+            MessageType.RELEASE_KEYS,
+            list(keys)
+        )
+    
+    def fetch_keys(self, keys: Iterable[Any]) -> Dict[str, Any]:
+        return self.local_node.send_request(
+            self.address,
+            MessageType.FETCH_KEYS,
+            list(keys)
+        )
+    
+    def fetch_versioned(self, keys: Iterable[str], known: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        result = self.local_node.send_request(
+            self.address,
+            MessageType.FETCH_VERSIONED,
+            list(keys),
+            known or {}
+        )
+        return {key: tuple(record) if record is not None else None for key, record in result.items()}
+    
+    @property
+    def data(self) -> 'RemoteChordData':
+        return RemoteChordData(self)
+    
+    def local_range_query_sorted(self, attr_name: str, min_val, max_val,
+                                 limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Any]:
+        return self.local_node.send_request(
+            self.address,
+            MessageType.RANGE_QUERY,
+            attr_name,
+            min_val,
+            max_val,
+            limit,
+            order_by
+        )
+    
     def __repr__(self):
         return f"<RemoteChordNode {self.address} ID:{self._hex_id if self._hex_id else '?'}>"
+
+
+class RemoteChordData:
+    # The subset of the local data store that ChordNode uses on a responsible node.
+    def __init__(self, remote_node: RemoteChordNode):
+        self.remote_node = remote_node
+    
+    def __setitem__(self, key: str, value: Any):
+        self.remote_node.accept_keys([(key, value)])
+    
+    def __delitem__(self, key: str):
+        self.remote_node.release_keys([key])
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.remote_node.fetch_keys([key])
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.remote_node.fetch_keys([key]).get(key, default)
+    
+    def iter_items(self) -> Iterator[Tuple[str, Any]]:
+        for chunk in self.remote_node.hand_off_chunks():
+            yield from chunk
+    
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return self.iter_items()
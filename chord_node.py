@@ -1,9 +1,65 @@
-from typing import List, Optional
+from bisect import bisect_left
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
 from dht_hash import DHTHasher
-from bplus_tree import BPlusTree
+from bplus_tree import IndexedBPlusTree, DEFAULT_INDEXED_FIELDS
+from distributed_query import fan_out_range_query, local_sorted_range
+
+class FingerTable(list):
+    # The sorted (offsets, nodes) index is published as one tuple and tagged with the generation it
+    # was built from, so a rebuild racing a __setitem__ never overwrites the newer invalidation.
+    def __init__(self, owner: 'ChordNode', nodes: Iterable['ChordNode']):
+        super().__init__(nodes)
+        self.owner = owner
+        self._index: Optional[Tuple[List[int], List['ChordNode']]] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __setitem__(self, index, node):
+        with self._lock:
+            if self[index] is not node:
+                super().__setitem__(index, node)
+                self._generation += 1
+                self._index = None
+
+    def _rebuild(self) -> Tuple[List[int], List['ChordNode']]:
+        with self._lock:
+            generation = self._generation
+            fingers = list(self)
+        
+        ring_size = self.owner.hasher.ring_size
+        distinct = {}
+        for node in fingers:
+            node_id = node.id if node is not None else None
+            if node_id is not None:
+                distinct[node_id] = node
+        
+        entries = sorted(
+            (((node_id - self.owner.id) % ring_size, node) for node_id, node in distinct.items()),
+            key=lambda entry: entry[0]
+        )
+        index = ([offset for offset, _ in entries], [node for _, node in entries])
+        with self._lock:
+            if self._generation == generation:
+                self._index = index
+        return index
+
+    def closest_preceding(self, id: int) -> Optional['ChordNode']:
+        index = self._index
+        if index is None:
+            index = self._rebuild()
+        offsets, nodes = index
+        
+        target = (id - self.owner.id) % self.owner.hasher.ring_size or self.owner.hasher.ring_size
+        i = bisect_left(offsets, target) - 1
+        if i >= 0 and offsets[i] > 0:
+            return nodes[i]
+        return None
+
 
 class ChordNode:
-    def __init__(self, ip: str, port: int, m_bits: int = 160, successor_list_size: int = 3):
+    def __init__(self, ip: str, port: int, m_bits: int = 160, successor_list_size: int = 3, tree_order: int = 10,
+                 indexed_fields: Iterable[str] = DEFAULT_INDEXED_FIELDS):
         self.ip = ip
         self.port = port
         self.address = f"{ip}:{port}"
@@ -12,12 +68,24 @@ class ChordNode:
         self.id = self.hasher.hash_node_id(self.address)
         self.successor: 'ChordNode' = self
         self.predecessor: Optional['ChordNode'] = None
-        self.finger_table: List['ChordNode'] = [self] * self.m_bits
+        self.finger_starts: List[int] = [(self.id + (1 << i)) % self.hasher.ring_size for i in range(self.m_bits)]
+        self.finger_table = [self] * self.m_bits
         self.next_finger = 0
-        self.data = BPlusTree(order=10)
+        self.tree_order = tree_order
+        self.data = IndexedBPlusTree(order=tree_order, indexed_fields=indexed_fields,
+                                     key_hasher=self.hasher.hash_key)
         self.successor_list_size = successor_list_size
         self.successor_list: List['ChordNode'] = []
-        self.replicas = BPlusTree(order=10)
+        self.replicas = IndexedBPlusTree(order=tree_order, indexed_fields=(),
+                                         key_hasher=self.hasher.hash_key)
+
+    @property
+    def finger_table(self) -> FingerTable:
+        return self._finger_table
+
+    @finger_table.setter
+    def finger_table(self, nodes: Iterable['ChordNode']):
+        self._finger_table = FingerTable(self, nodes)
 
     def __repr__(self):
         return f"<ChordNode {self.address} ID:{self.hasher.get_hex_id(self.id)[:8]}...>"
@@ -31,25 +99,47 @@ class ChordNode:
             raise IndexError(f"Finger table index {index} out of range (0-{self.m_bits-1})")
 
     def find_successor(self, id: int) -> 'ChordNode':
-        if self.hasher.in_range(id, self.id, self.successor.id, inclusive_start=False, inclusive_end=True):
-            return self.successor
-        else:
-            n0 = self.closest_preceding_node(id)
-            if n0 is self:
-                return self.successor
+        node, _, _ = self.find_successor_route(id)
+        return node
+
+    def find_successor_route(self, id: int) -> Tuple['ChordNode', int, List['ChordNode']]:
+        current = self
+        path = [self]
+        visited = {self.id}
+        
+        while True:
+            done, node = current.find_successor_step(id)
+            if done:
+                break
+            if node.id in visited:
+                node = current.successor
+                break
             
-            return n0.find_successor(id)
+            visited.add(node.id)
+            path.append(node)
+            current = node
+        
+        path.append(node)
+        return node, len(path) - 1, path
+
+    def find_successor_step(self, id: int) -> Tuple[bool, 'ChordNode']:
+        # One hop of find_successor_route answered from local state, so a remote hop costs one RPC:
+        # (True, owner) when id falls in (self, successor], else (False, next node to ask).
+        successor = self.successor
+        if self.hasher.in_range(id, self.id, successor.id, inclusive_start=False, inclusive_end=True):
+            return True, successor
+        
+        next_node = self.closest_preceding_node(id)
+        if next_node is self:
+            return True, successor
+        return False, next_node
 
     def closest_preceding_node(self, id: int) -> 'ChordNode':
-        for i in range(self.m_bits - 1, -1, -1):
-            finger_node = self.finger_table[i]
-            if self.hasher.in_range(finger_node.id, self.id, id, inclusive_start=False, inclusive_end=False):
-                return finger_node
-        return self
+        node = self._finger_table.closest_preceding(id)
+        return self if node is None else node
 
     def init_finger_table(self, verbose: bool = False):
-        for i in range(self.m_bits):
-            start = (self.id + (2 ** i)) % (2 ** self.m_bits)
+        for i, start in enumerate(self.finger_starts):
             self.finger_table[i] = self.find_successor(start)
             if i == 0:
                 self.successor = self.finger_table[0]
@@ -85,17 +175,56 @@ class ChordNode:
             return
         
         if self.predecessor is None:
-            keys_to_transfer = dict(self.successor.data)
+            chunks = self.successor.hand_off_chunks()
         else:
-            keys_to_transfer = self.successor._get_keys_for_range(self.predecessor.id, self.id)
+            chunks = self.successor.hand_off_chunks(self.predecessor.id, self.id)
         
-        for key, value in keys_to_transfer.items():
-            self.data[key] = value
-            if key in self.successor.data:
-                del self.successor.data[key]
-
+        for chunk in chunks:
+            self.accept_keys(chunk)
+            self.successor.release_keys([key for key, _ in chunk])
+    
+    def read_chunk(self, start_id: Optional[int] = None, end_id: Optional[int] = None,
+                   cursor: Any = None, limit: int = 1000) -> Tuple[List[Tuple[Any, Any]], Any]:
+        if start_id is None or end_id is None:
+            return self.data.read_chunk(cursor, limit)
+        return self.data.read_ring_chunk(start_id, end_id, cursor, limit)
+    
+    def hand_off_chunks(self, start_id: Optional[int] = None, end_id: Optional[int] = None,
+                        chunk_size: int = 1000) -> Iterator[List[Tuple[Any, Any]]]:
+        # Each chunk re-seeks from the cursor, so keys released between chunks are safe.
+        cursor = None
+        while True:
+            items, cursor = self.read_chunk(start_id, end_id, cursor, chunk_size)
+            if items:
+                yield items
+            if cursor is None:
+                return
+    
+    def accept_keys(self, items: Iterable[Tuple[Any, Any]]):
+        items = dict(items)
+        if len(self.data) <= len(items):
+            self.data.bulk_load(sorted(items.items()))
+        else:
+            for key, value in items.items():
+                self.data[key] = value
+    
+    def fetch_keys(self, keys: Iterable[Any]) -> dict:
+        return {key: self.data[key] for key in keys if key in self.data}
+    
+    def fetch_versioned(self, keys: Iterable[Any], known: Optional[dict] = None) -> dict:
+        return self.data.fetch_versioned(keys, known)
+    
+    def release_keys(self, keys: Iterable[Any]) -> int:
+        released = 0
+        for key in keys:
+            if key in self.data:
+                del self.data[key]
+                released += 1
+        return released
+    
     def stabilize(self):
-        if self.successor is None or self.successor is self:
+        # A ring creator still points at itself until it adopts the first node that notified it.
+        if self.successor is None:
             return
         
         try:
@@ -127,7 +256,7 @@ class ChordNode:
             self._redistribute_keys()
 
     def fix_fingers(self, verbose: bool = False):
-        start = (self.id + (2 ** self.next_finger)) % (2 ** self.m_bits)
+        start = self.finger_starts[self.next_finger]
         self.finger_table[self.next_finger] = self.find_successor(start)
         if self.next_finger == 0:
             self.successor = self.finger_table[0]
@@ -157,8 +286,8 @@ class ChordNode:
         if self.successor is None or self.successor is self:
             return
         
-        for key, value in self.data.items():
-            self.successor.data[key] = value
+        for chunk in self.hand_off_chunks():
+            self.successor.accept_keys(chunk)
     
     def _transfer_data_to_predecessor(self, new_predecessor: 'ChordNode', old_predecessor: Optional['ChordNode'] = None):
         if new_predecessor is None or new_predecessor is self:
@@ -211,34 +340,53 @@ class ChordNode:
             return True
         return False
     
+    def owns(self, key_id: int) -> bool:
+        if self.predecessor is None or self.predecessor is self:
+            return True
+        return self.hasher.in_range(key_id, self.predecessor.id, self.id)
+    
+    def group_by_owner(self, keys: Iterable[str], locate: Optional[Callable[[int], 'ChordNode']] = None) -> dict:
+        def predecessor_id(owner) -> Optional[int]:
+            predecessor = owner.predecessor
+            return predecessor.id if predecessor is not None else None
+        
+        return self.hasher.group_by_successor(keys, locate or self.find_successor, predecessor_id)
+    
+    def multi_insert(self, items, locate: Optional[Callable[[int], 'ChordNode']] = None) -> int:
+        items = dict(items)
+        for owner, keys in self.group_by_owner(items, locate).items():
+            owner.accept_keys([(key, items[key]) for key in keys])
+        return len(items)
+    
+    def multi_lookup(self, keys: Iterable[str], locate: Optional[Callable[[int], 'ChordNode']] = None) -> dict:
+        results = {}
+        for owner, owned in self.group_by_owner(keys, locate).items():
+            found = owner.fetch_keys(owned)
+            results.update((key, found.get(key)) for key in owned)
+        return results
+    
+    def multi_delete(self, keys: Iterable[str], locate: Optional[Callable[[int], 'ChordNode']] = None) -> int:
+        groups = self.group_by_owner(set(keys), locate)
+        return sum(owner.release_keys(owned) for owner, owned in groups.items())
+    
     def _redistribute_keys(self):
         if self.predecessor is None:
             return
         
-        keys_to_redistribute = []
+        if self.predecessor.id == self.id:
+            return
         
-        for key, value in list(self.data.items()):
-            key_id = self.hasher.hash_key(key)
-            if not self.hasher.in_range(key_id, self.predecessor.id, self.id, 
-                                       inclusive_start=False, inclusive_end=True):
-                keys_to_redistribute.append((key, value))
+        keys_to_redistribute = list(self.data.iter_ring_range(self.id, self.predecessor.id))
         
-        for key, value in keys_to_redistribute:
+        for key_id, key, value in keys_to_redistribute:
             if key in self.data:
                 del self.data[key]
-            key_id = self.hasher.hash_key(key)
             new_responsible = self.find_successor(key_id)
             if key not in new_responsible.data:
                 new_responsible.data[key] = value
     
     def _get_keys_for_range(self, start_id: int, end_id: int) -> dict:
-        keys_in_range = {}
-        for key, value in self.data.items():
-            key_id = self.hasher.hash_key(key)
-            if self.hasher.in_range(key_id, start_id, end_id, 
-                                   inclusive_start=False, inclusive_end=True):
-                keys_in_range[key] = value
-        return keys_in_range
+        return {key: value for _, key, value in self.data.iter_ring_range(start_id, end_id)}
     
     def _update_successor_list(self):
         self.successor_list = []
@@ -287,7 +435,7 @@ class ChordNode:
         for successor in self.successor_list:
             try:
                 if hasattr(successor, 'replicas'):
-                    for key, value in self.data.items():
+                    for key, value in self.data.iter_items():
                         successor.replicas[key] = value
             except Exception:
                 continue
@@ -298,26 +446,25 @@ class ChordNode:
         
         try:
             if hasattr(self.predecessor, 'data'):
-                for key, value in self.predecessor.data.items():
-                    key_id = self.hasher.hash_key(key)
-                    if self.hasher.in_range(key_id, self.predecessor.id, self.id,
-                                          inclusive_start=False, inclusive_end=True):
-                        if key not in self.data:
-                            self.data[key] = value
+                for _, key, value in self.predecessor.data.iter_ring_range(self.predecessor.id, self.id):
+                    if key not in self.data:
+                        self.data[key] = value
         except Exception:
             pass
         
-        for key, value in list(self.replicas.items()):
+        for key_id, key, value in list(self.replicas.iter_ring_range()):
             if key not in self.data:
-                key_id = self.hasher.hash_key(key)
                 responsible = self.find_successor(key_id)
                 if responsible is self:
                     self.data[key] = value
                     del self.replicas[key]
 
     def local_range_query(self, attr_name: str, min_val, max_val):
+        if attr_name in self.data.indexes:
+            return list(self.data.iter_attribute_range(attr_name, min_val, max_val))
+        
         results = []
-        for key, value in self.data.items():
+        for value in self.data.iter_values():
             if isinstance(value, dict) and attr_name in value:
                 attr_val = value[attr_name]
                 if min_val <= attr_val <= max_val:
@@ -332,3 +479,30 @@ class ChordNode:
     
     def local_query_by_year(self, min_year: int, max_year: int):
         return self.local_range_query('year', min_year, max_year)
+    
+    def local_range_query_sorted(self, attr_name: str, min_val, max_val,
+                                 limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Any]:
+        return local_sorted_range(self, attr_name, min_val, max_val, limit, order_by)
+    
+    def _ring_members(self) -> List['ChordNode']:
+        members = []
+        seen = set()
+        pending = [self] + list(self.successor_list) + list(self.finger_table)
+        
+        while pending:
+            node = pending.pop(0)
+            try:
+                if node is None or node.id is None or node.id in seen:
+                    continue
+                seen.add(node.id)
+                members.append(node)
+                pending.append(node.successor)
+                pending.append(node.predecessor)
+            except Exception:
+                continue
+        
+        return members
+    
+    def distributed_range_query(self, attr_name: str, min_val, max_val, limit: Optional[int] = None,
+                                order_by: Optional[str] = None, max_workers: int = 10) -> List[Any]:
+        return fan_out_range_query(self._ring_members(), attr_name, min_val, max_val, limit, order_by, max_workers)
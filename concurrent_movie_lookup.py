@@ -95,6 +95,44 @@ class ConcurrentMovieLookup:
         
         return results
     
+    def lookup_movies_batched(self, titles: List[str]) -> Dict[str, Dict]:
+        # One fetch per owner, so an owner that fails only fails its own titles.
+        batch_start = time.time()
+        found = {}
+        errors = {}
+        try:
+            groups = self.mapper.group_by_owner(titles)
+        except Exception as e:
+            groups = {}
+            errors.update((title, f"Error: {str(e)}") for title in titles)
+        
+        for owner, owned in groups.items():
+            try:
+                found.update(self.mapper.lookup_owned(owner, owned))
+            except Exception as e:
+                errors.update((title, f"Error: {str(e)}") for title in owned)
+        lookup_time = time.time() - batch_start
+        
+        results = {}
+        for title in titles:
+            metadata = found.get(title)
+            results[title] = {
+                'popularity': metadata.get('popularity') if metadata else None,
+                'metadata': metadata,
+                'status': 'success' if metadata else 'failed',
+                'error': None if metadata else errors.get(title, "Movie not found in DHT"),
+                'lookup_time': lookup_time
+            }
+        
+        with self.lock:
+            self.stats['total_queries'] = len(titles)
+            self.stats['successful_queries'] = sum(1 for data in results.values() if data['metadata'])
+            self.stats['failed_queries'] = len(results) - self.stats['successful_queries']
+            self.stats['total_time'] = lookup_time
+            self.stats['batch_time'] = lookup_time
+        
+        return results
+    
     def get_popularity_only(self, titles: List[str]) -> Dict[str, Optional[float]]:
-        results = self.lookup_movies_concurrent(titles)
+        results = self.lookup_movies_batched(titles)
         return {title: data['popularity'] for title, data in results.items()}
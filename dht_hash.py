@@ -1,22 +1,59 @@
 import hashlib
-from typing import Union
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Process-wide: every DHTHasher with the same (m_bits, cache_size) shares one cache, so simulated nodes
+# in one process hash each key once between them.
+_identifier_caches: Dict[Tuple[int, int], Callable[[str], int]] = {}
+
+
+def _cached_identifier_function(m_bits: int, cache_size: int) -> Callable[[str], int]:
+    cache_key = (m_bits, cache_size)
+    function = _identifier_caches.get(cache_key)
+    if function is None:
+        ring_size = 2 ** m_bits
+        
+        def compute(key: str) -> int:
+            digest = hashlib.sha1(key.strip().lower().encode('utf-8')).digest()
+            return int.from_bytes(digest, byteorder='big') % ring_size
+        
+        function = _identifier_caches.setdefault(cache_key, lru_cache(maxsize=cache_size)(compute))
+    return function
+
+
+def identifier_cache_info() -> Dict[str, int]:
+    # Totals over all shared identifier caches, not just one hasher's.
+    infos = [function.cache_info() for function in list(_identifier_caches.values())]
+    return {
+        'hits': sum(info.hits for info in infos),
+        'misses': sum(info.misses for info in infos),
+        'size': sum(info.currsize for info in infos),
+        'max_size': sum(info.maxsize for info in infos)
+    }
+
+
+def clear_identifier_caches():
+    # Empties the shared caches for every hasher in the process.
+    for function in list(_identifier_caches.values()):
+        function.cache_clear()
 
 
 class DHTHasher:
 
     
-    def __init__(self, m_bits: int = 160):
+    def __init__(self, m_bits: int = 160, cache_size: int = 65536):
         self.m_bits = m_bits
         self.ring_size = 2 ** m_bits
+        self.cache_size = cache_size
+        self._cached_hash = _cached_identifier_function(m_bits, cache_size)
         
     def hash_key(self, key: str) -> int:
-        normalized_key = key.strip().lower()
-        key_bytes = normalized_key.encode('utf-8')
-        hash_obj = hashlib.sha1(key_bytes) 
-        hex_digest = hash_obj.hexdigest()
-        hash_int = int(hex_digest, 16)
-        identifier = hash_int % self.ring_size
-        return identifier
+        return self._cached_hash(key)
+    
+    def hash_keys(self, keys: Iterable[str]) -> List[int]:
+        cached_hash = self._cached_hash
+        return [cached_hash(key) for key in keys]
     
     def hash_node_id(self, node_address: str) -> int:
 
@@ -60,6 +97,25 @@ class DHTHasher:
             else:
                 return identifier > start or identifier < end
     
+    def group_by_successor(self, keys: Iterable[str], locate: Callable[[int], Any],
+                           lower_bound: Optional[Callable[[Any], Optional[int]]] = None) -> Dict[Any, List[str]]:
+        # Walk keys in ring order: every key between the last routed key and its owner's id
+        # has the same successor, so locate runs once per owner rather than once per key.
+        # lower_bound(owner) narrows the claim to what the owner believes it owns.
+        keys = list(keys)
+        groups: Dict[Any, List[str]] = {}
+        owner = None
+        start_id = bound = None
+        for key_id, key in sorted(zip(self.hash_keys(keys), keys)):
+            if owner is None or not (key_id == start_id or (
+                    start_id != owner.id and self.in_range(key_id, start_id, owner.id, inclusive_start=True)
+                    and (bound is None or self.in_range(key_id, bound, owner.id)))):
+                start_id = key_id
+                owner = locate(key_id)
+                bound = lower_bound(owner) if lower_bound else None
+            groups.setdefault(owner, []).append(key)
+        return groups
+    
     def get_hex_id(self, identifier: int, digits: int = 40) -> str:
         return format(identifier, f'0{digits}x')
     
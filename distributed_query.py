@@ -0,0 +1,94 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+
+class IncompleteQueryError(RuntimeError):
+    # Some nodes could not be queried; results holds the merged answer from the ones that replied.
+    def __init__(self, failed: List[str], results: List[Any]):
+        super().__init__(f"Range query incomplete, {len(failed)} node(s) failed: {', '.join(failed)}")
+        self.failed = failed
+        self.results = results
+
+
+def parse_order_by(attr_name: str, order_by: Optional[str]) -> Tuple[str, bool]:
+    if order_by is None:
+        return attr_name, False
+    if order_by.startswith('-'):
+        return order_by[1:], True
+    return order_by, False
+
+
+class _Descending:
+    __slots__ = ('value',)
+    
+    def __init__(self, value: Any):
+        self.value = value
+    
+    def __lt__(self, other: '_Descending') -> bool:
+        return other.value < self.value
+    
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+def record_sort_key(field: str, descending: bool) -> Callable[[Any], Tuple[int, Any]]:
+    # Numbers sort before strings; records missing the field (or holding anything else) go last.
+    def key(record: Any) -> Tuple[int, Any]:
+        value = record.get(field) if isinstance(record, dict) else None
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value == value:
+            return (0, -value if descending else value)
+        if isinstance(value, str):
+            return (1, _Descending(value) if descending else value)
+        return (2, 0)
+    return key
+
+
+def local_sorted_range(node: Any, attr_name: str, min_val, max_val,
+                       limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Any]:
+    field, descending = parse_order_by(attr_name, order_by)
+    indexes = getattr(node.data, 'indexes', {})
+    
+    if attr_name in indexes:
+        if field == attr_name:
+            return list(node.data.iter_attribute_range(
+                attr_name, min_val, max_val, reverse=descending, limit=limit
+            ))
+        matches = node.data.iter_attribute_range(attr_name, min_val, max_val)
+    else:
+        matches = node.local_range_query(attr_name, min_val, max_val)
+    
+    key = record_sort_key(field, descending)
+    if limit is None:
+        return sorted(matches, key=key)
+    return heapq.nsmallest(limit, matches, key=key)
+
+
+def merge_sorted_ranges(partials: Iterable[List[Any]], attr_name: str,
+                        limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Any]:
+    field, descending = parse_order_by(attr_name, order_by)
+    merged = heapq.merge(*partials, key=record_sort_key(field, descending))
+    return list(islice(merged, limit))
+
+
+def fan_out_range_query(members: Iterable[Any], attr_name: str, min_val, max_val, limit: Optional[int] = None,
+                        order_by: Optional[str] = None, max_workers: int = 10) -> List[Any]:
+    # Queries every member in parallel and merges their sorted partials. If any member fails, raises
+    # IncompleteQueryError naming the failed addresses, with the merged partial answer in .results.
+    failed = []
+    
+    def query(node) -> List[Any]:
+        try:
+            return node.local_range_query_sorted(attr_name, min_val, max_val, limit, order_by)
+        except Exception:
+            failed.append(node.address)
+            return []
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        partials = list(executor.map(query, members))
+    
+    results = merge_sorted_ranges(partials, attr_name, limit, order_by)
+    if failed:
+        raise IncompleteQueryError(sorted(failed), results)
+    return results
@@ -1,8 +1,9 @@
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Union
 from enum import Enum
+import itertools
 import json
+import random
 import time
-import uuid
 
 
 class MessageType(Enum):
@@ -32,24 +33,75 @@ class MessageType(Enum):
     GET_SUCCESSOR_LIST = "get_successor_list"
     GET_REPLICAS = "get_replicas"
     CHECK_PREDECESSOR = "check_predecessor"
+    RANGE_QUERY = "range_query"
+    DISTRIBUTED_RANGE_QUERY = "distributed_range_query"
+    RELEASE_KEYS = "release_keys"
+    FETCH_KEYS = "fetch_keys"
+    MULTI_INSERT = "multi_insert"
+    MULTI_LOOKUP = "multi_lookup"
+    MULTI_DELETE = "multi_delete"
+    FETCH_VERSIONED = "fetch_versioned"
+    FIND_SUCCESSOR_STEP = "find_successor_step"
     RESPONSE = "response"
+    BUSY = "busy"
     ERROR = "error"
 
 
+# Operations that move many records at once and are worth compressing.
+BULK_OPERATIONS = frozenset({
+    MessageType.GET_DATA,
+    MessageType.GET_REPLICAS,
+    MessageType.TRANSFER_KEYS,
+    MessageType.GET_KEYS_FOR_RANGE,
+    MessageType.FETCH_KEYS,
+    MessageType.MULTI_INSERT,
+    MessageType.MULTI_LOOKUP,
+})
+
+# Served from the receiving node's own state without issuing RPCs, so queueing them on a bounded
+# worker pool cannot deadlock. Anything else may block on nested calls to other nodes.
+LOCAL_OPERATIONS = frozenset({
+    MessageType.FIND_SUCCESSOR_STEP,
+    MessageType.CLOSEST_PRECEDING_NODE,
+    MessageType.GET_PREDECESSOR,
+    MessageType.GET_SUCCESSOR,
+    MessageType.GET_SUCCESSOR_LIST,
+    MessageType.NOTIFY,
+    MessageType.GET_LEAF_SET,
+    MessageType.GET_NODE_INFO,
+    MessageType.GET_DATA,
+    MessageType.GET_REPLICAS,
+    MessageType.GET_KEYS_FOR_RANGE,
+    MessageType.TRANSFER_KEYS,
+    MessageType.RELEASE_KEYS,
+    MessageType.FETCH_KEYS,
+    MessageType.FETCH_VERSIONED,
+    MessageType.RANGE_QUERY,
+    MessageType.PING,
+})
+
+
+# Request ids only need to be unique per sender; a random starting point keeps
+# them from repeating across restarts while still fitting in 64 bits.
+_request_ids = itertools.count(random.getrandbits(32) << 24)
+
+RequestId = Union[int, str]
+
+
 class Message:
     def __init__(
         self,
         msg_type: MessageType,
         sender_address: str,
         receiver_address: str,
-        request_id: Optional[str] = None,
+        request_id: Optional[RequestId] = None,
         payload: Optional[Dict[str, Any]] = None,
         timestamp: Optional[float] = None
     ):
         self.msg_type = msg_type
         self.sender_address = sender_address
         self.receiver_address = receiver_address
-        self.request_id = request_id or str(uuid.uuid4())
+        self.request_id = request_id if request_id is not None else next(_request_ids)
         self.payload = payload or {}
         self.timestamp = timestamp or time.time()
     
@@ -80,7 +132,7 @@ class Message:
         except ValueError:
             msg_type = msg_type_str
         
-        if msg_type == MessageType.RESPONSE:
+        if msg_type in (MessageType.RESPONSE, MessageType.BUSY):
             payload = data.get('payload', {})
             return ResponseMessage(
                 sender_address=data['sender_address'],
@@ -88,7 +140,8 @@ class Message:
                 request_id=data.get('request_id'),
                 result=payload.get('result'),
                 success=payload.get('success', True),
-                error=payload.get('error')
+                error=payload.get('error'),
+                msg_type=msg_type
             )
         
         payload = data.get('payload', {})
@@ -138,7 +191,7 @@ class RequestMessage(Message):
         receiver_address: str,
         args: Optional[List[Any]] = None,
         kwargs: Optional[Dict[str, Any]] = None,
-        request_id: Optional[str] = None
+        request_id: Optional[RequestId] = None
     ):
         payload = {
             'operation': operation.value if isinstance(operation, MessageType) else operation,
@@ -171,10 +224,11 @@ class ResponseMessage(Message):
         self,
         sender_address: str,
         receiver_address: str,
-        request_id: str,
+        request_id: RequestId,
         result: Any = None,
         success: bool = True,
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        msg_type: MessageType = MessageType.RESPONSE
     ):
         payload = {
             'result': result,
@@ -182,7 +236,7 @@ class ResponseMessage(Message):
             'error': error
         }
         super().__init__(
-            msg_type=MessageType.RESPONSE,
+            msg_type=msg_type,
             sender_address=sender_address,
             receiver_address=receiver_address,
             request_id=request_id,
@@ -257,3 +311,14 @@ def create_response(
         success=success,
         error=error
     )
+
+
+def create_busy_response(request: RequestMessage, error: str = "Node overloaded") -> ResponseMessage:
+    return ResponseMessage(
+        sender_address=request.receiver_address,
+        receiver_address=request.sender_address,
+        request_id=request.request_id,
+        success=False,
+        error=error,
+        msg_type=MessageType.BUSY
+    )
@@ -1,15 +1,24 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from chord_node import ChordNode
 from dht_hash import DHTHasher
+from owner_cache import OwnerCache
+from value_cache import ValueCache
 import json
+import time
 
 
 class MovieDHTMapper:
-    def __init__(self, m_bits: int = 160):
+    def __init__(self, m_bits: int = 160, lookup_cache_size: int = 0, lookup_cache_ttl: Optional[float] = 30.0,
+                 lookup_cache_policy: str = 'lru', lookup_cache_fresh_for: float = 0.0):
         self.m_bits = m_bits
         self.hasher = DHTHasher(m_bits)
         self.nodes: List[ChordNode] = []
         self.movie_key_mappings: List[Tuple[str, int, str]] = []
+        self.owner_cache = OwnerCache(self.hasher)
+        self.lookup_cache: Optional[ValueCache] = None
+        if lookup_cache_size:
+            self.lookup_cache = ValueCache(lookup_cache_size, lookup_cache_ttl, lookup_cache_policy,
+                                           fresh_for=lookup_cache_fresh_for)
         
     def create_chord_ring(self, num_nodes: int = 5) -> List[ChordNode]:
         nodes = []
@@ -25,18 +34,54 @@ class MovieDHTMapper:
         for i in range(1, len(nodes)):
             nodes[i].join(introducer, init_fingers=True, transfer_data=True)
         
+        self.stabilize_ring(nodes)
+        
+        self.nodes = nodes
+        self.owner_cache.clear()
+        if self.lookup_cache is not None:
+            self.lookup_cache.clear()
+        return nodes
+    
+    def add_node(self, ip: str, port: int) -> ChordNode:
+        if not self.nodes:
+            raise RuntimeError("No Chord ring created. Call create_chord_ring() first.")
+        
+        node = ChordNode(ip, port, self.m_bits)
+        node.join(self.nodes[0], init_fingers=True, transfer_data=True)
+        self.nodes.append(node)
+        self.stabilize_ring(self.nodes)
+        self.owner_cache.node_joined(node.id)
+        return node
+    
+    def stabilize_ring(self, nodes: List[ChordNode], rounds: int = 30):
         print("Stabilizing ring and populating finger tables...")
-        for _ in range(30):
+        for _ in range(rounds):
             for node in nodes:
                 node.stabilize()
                 node.check_predecessor()
                 for _ in range(10):
                     node.fix_fingers()
-            import time
             time.sleep(0.05)
+    
+    def remove_node(self, node: ChordNode):
+        node.leave()
+        self.nodes.remove(node)
+        self.owner_cache.node_left(node)
+    
+    def locate_owner(self, key_hash: int) -> ChordNode:
+        owner = self.owner_cache.get(key_hash)
+        if owner is not None:
+            if owner.owns(key_hash):
+                return owner
+            self.owner_cache.invalidate(key_hash)
         
-        self.nodes = nodes
-        return nodes
+        owner = self.nodes[0].find_successor(key_hash)
+        # owns() accepts any key while the predecessor is unknown, so such an owner's interval is
+        # not known yet and must not be cached.
+        predecessor = owner.predecessor
+        if predecessor is not None and owner.owns(key_hash):
+            self.owner_cache.put(predecessor.id, owner.id, owner)
+        return owner
     
     def generate_sample_movies(self) -> List[Dict]:
         movies = [
@@ -140,9 +185,8 @@ class MovieDHTMapper:
         
         self.movie_key_mappings = []
         
-        for movie in movies:
-            title = movie['title']
-            key_hash = self.hasher.hash_key(title)
+        titles = [movie['title'] for movie in movies]
+        for title, key_hash in zip(titles, self.hasher.hash_keys(titles)):
             hex_id = self.hasher.get_hex_id(key_hash)
             self.movie_key_mappings.append((title, key_hash, hex_id))
         
@@ -160,6 +204,8 @@ class MovieDHTMapper:
             'failed': 0,
             'node_distribution': {node.address: 0 for node in self.nodes}
         }
+        titles: List[str] = []
+        batch: Dict[str, Dict] = {}
         
         for movie in movies:
             try:
@@ -180,31 +226,72 @@ class MovieDHTMapper:
                     'countries': movie['countries']
                 }
                 
-                any_node = self.nodes[0]
-                success = any_node.insert(title, metadata)
-                
-                if success:
-                    insertion_stats['success'] += 1
-                    
-                    key_hash = self.hasher.hash_key(title)
-                    responsible_node = any_node.find_successor(key_hash)
-                    insertion_stats['node_distribution'][responsible_node.address] += 1
-                else:
-                    insertion_stats['failed'] += 1
+                titles.append(title)
+                batch[title] = metadata
                     
             except Exception as e:
                 print(f"Error inserting movie '{movie.get('title', 'UNKNOWN')}': {e}")
                 insertion_stats['failed'] += 1
         
+        groups = self.group_by_owner(titles)
+        for node, owned in groups.items():
+            node.accept_keys([(title, batch[title]) for title in owned])
+            insertion_stats['success'] += len(owned)
+            insertion_stats['node_distribution'][node.address] += len(owned)
+        
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate_many(batch)
+        
         return insertion_stats
     
     def query_movie(self, title: str) -> Dict:
         if not self.nodes:
             raise RuntimeError("No Chord ring created.")
         
-        any_node = self.nodes[0]
-        result = any_node.lookup(title)
-        return result
+        if self.lookup_cache is not None:
+            return self.lookup_cache.fetch(title, self.group_by_owner)
+        return self._lookup_uncached(title)
+    
+    def group_by_owner(self, titles: List[str]) -> Dict[ChordNode, List[str]]:
+        return self.nodes[0].group_by_owner(titles, self.locate_owner)
+    
+    def _lookup_uncached(self, title: str) -> Optional[Dict]:
+        owner = self.locate_owner(self.hasher.hash_key(title))
+        return owner.data.get(title)
+    
+    def multi_insert(self, items: Dict[str, Dict]) -> int:
+        if not self.nodes:
+            raise RuntimeError("No Chord ring created.")
+        
+        items = dict(items)
+        count = self.nodes[0].multi_insert(items, self.locate_owner)
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate_many(items)
+        return count
+    
+    def multi_lookup(self, titles: List[str]) -> Dict[str, Dict]:
+        if not self.nodes:
+            raise RuntimeError("No Chord ring created.")
+        
+        if self.lookup_cache is not None:
+            return self.lookup_cache.fetch_many(titles, self.group_by_owner)
+        return self.nodes[0].multi_lookup(titles, self.locate_owner)
+    
+    def lookup_owned(self, owner: ChordNode, titles: List[str]) -> Dict[str, Dict]:
+        # multi_lookup for titles already grouped onto owner, so they are not routed a second time.
+        if self.lookup_cache is not None:
+            return self.lookup_cache.fetch_many(titles, lambda missing: {owner: list(missing)})
+        found = owner.fetch_keys(titles)
+        return {title: found.get(title) for title in titles}
+    
+    def multi_delete(self, titles: List[str]) -> int:
+        if not self.nodes:
+            raise RuntimeError("No Chord ring created.")
+        
+        count = self.nodes[0].multi_delete(titles, self.locate_owner)
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate_many(titles)
+        return count
     
     def print_mapping_report(self, max_entries: int = 20):
         print("\n" + "=" * 100)
@@ -288,8 +375,7 @@ class MovieDHTMapper:
         for title, key_hash, hex_id in self.movie_key_mappings:
             responsible_node = None
             if self.nodes:
-                node = self.nodes[0].find_successor(key_hash)
-                responsible_node = node.address
+                responsible_node = self.locate_owner(key_hash).address
             
             mappings.append({
                 'title': title,
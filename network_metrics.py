@@ -1,5 +1,5 @@
 import time
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from collections import defaultdict
 from dataclasses import dataclass, field
 import statistics
@@ -86,14 +86,29 @@ class NetworkMetrics:
         self.total_messages_sent = 0
         self.total_messages_received = 0
         self.active_requests: Dict[str, float] = {}
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.handler_queue_depth = 0
+        self.max_handler_queue_depth = 0
+        self.requests_rejected = 0
+        self.connections_rejected = 0
+        self.messages_compressed = 0
+        self.bytes_before_compression = 0
+        self.bytes_after_compression = 0
+        self.compression_time = 0.0
+        self.decompression_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_revalidations = 0
+        self.cache_invalidations = 0
     
-    def start_request(self, request_id: str, operation: str):
+    def start_request(self, request_id: Union[int, str], operation: str):
         self.active_requests[request_id] = time.time()
         self.total_messages_sent += 1
     
     def complete_request(
         self,
-        request_id: str,
+        request_id: Union[int, str],
         operation: str,
         success: bool = True,
         bytes_sent: int = 0,
@@ -127,6 +142,58 @@ class NetworkMetrics:
         if operation in self.operation_metrics:
             self.operation_metrics[operation].total_bytes_received += bytes_received
     
+    def record_connection(self, reused: bool):
+        if reused:
+            self.connections_reused += 1
+        else:
+            self.connections_opened += 1
+    
+    def record_queue_depth(self, depth: int):
+        self.handler_queue_depth = depth
+        if depth > self.max_handler_queue_depth:
+            self.max_handler_queue_depth = depth
+    
+    def record_rejection(self, connection: bool = False):
+        if connection:
+            self.connections_rejected += 1
+        else:
+            self.requests_rejected += 1
+    
+    def record_compression(self, original_bytes: int, compressed_bytes: int, elapsed: float):
+        self.messages_compressed += 1
+        self.bytes_before_compression += original_bytes
+        self.bytes_after_compression += compressed_bytes
+        self.compression_time += elapsed
+    
+    def record_decompression(self, elapsed: float):
+        self.decompression_time += elapsed
+    
+    @property
+    def compression_ratio(self) -> float:
+        if self.bytes_after_compression == 0:
+            return 0.0
+        return self.bytes_before_compression / self.bytes_after_compression
+    
+    def record_cache_lookup(self, hit: bool):
+        if hit:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+    
+    def record_cache_revalidation(self):
+        # A cached value the owner confirmed unchanged: routing was skipped, the round trip was not.
+        self.cache_revalidations += 1
+    
+    def record_cache_invalidation(self, count: int = 1):
+        self.cache_invalidations += count
+    
+    @property
+    def cache_hit_rate(self) -> float:
+        total = self.cache_hits + self.cache_revalidations + self.cache_misses
+        if total == 0:
+            return 0.0
+        return self.cache_hits / total
+    
     def get_operation_metrics(self, operation: str) -> Optional[OperationMetrics]:
         return self.operation_metrics.get(operation)
     
@@ -156,6 +223,23 @@ class NetworkMetrics:
             'total_bytes_sent': total_bytes_sent,
             'total_bytes_received': total_bytes_received,
             'throughput_msgs_per_sec': round(total_operations / max(elapsed_time, 0.001), 2),
+            'connections_opened': self.connections_opened,
+            'connections_reused': self.connections_reused,
+            'handler_queue_depth': self.handler_queue_depth,
+            'max_handler_queue_depth': self.max_handler_queue_depth,
+            'requests_rejected': self.requests_rejected,
+            'connections_rejected': self.connections_rejected,
+            'messages_compressed': self.messages_compressed,
+            'bytes_before_compression': self.bytes_before_compression,
+            'bytes_after_compression': self.bytes_after_compression,
+            'compression_ratio': round(self.compression_ratio, 2),
+            'compression_time_ms': round(self.compression_time * 1000, 2),
+            'decompression_time_ms': round(self.decompression_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_revalidations': self.cache_revalidations,
+            'cache_invalidations': self.cache_invalidations,
+            'cache_hit_rate': round(self.cache_hit_rate * 100, 2),
             'operations': {op: metrics.to_dict() for op, metrics in self.operation_metrics.items()}
         }
     
@@ -165,3 +249,18 @@ class NetworkMetrics:
         self.total_messages_sent = 0
         self.total_messages_received = 0
         self.active_requests.clear()
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.handler_queue_depth = 0
+        self.max_handler_queue_depth = 0
+        self.requests_rejected = 0
+        self.connections_rejected = 0
+        self.messages_compressed = 0
+        self.bytes_before_compression = 0
+        self.bytes_after_compression = 0
+        self.compression_time = 0.0
+        self.decompression_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_revalidations = 0
+        self.cache_invalidations = 0
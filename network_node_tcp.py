@@ -1,14 +1,129 @@
 import socket
+import struct
+import sys
 import threading
 import time
-from typing import Dict, Optional, Any, Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Tuple
 from queue import Queue, Empty
 
 from message_protocol import (
     Message, RequestMessage, ResponseMessage, MessageType,
-    create_request, create_response
+    create_request, create_response, create_busy_response, BULK_OPERATIONS, LOCAL_OPERATIONS
 )
 from network_metrics import NetworkMetrics
+from value_cache import ValueCache
+from wire_codec import (
+    Codec, get_codec, check_compression, decode_body, frame_body,
+    is_compressed, compress_body, decompress_body
+)
+
+
+class NodeBusyError(ConnectionError):
+    pass
+
+
+class FrameBuffer:
+    def __init__(self, retain_size: int = 1 << 20):
+        self.header = bytearray(4)
+        self.buffer = bytearray()
+        self.retain_size = retain_size
+    
+    def view(self, size: int) -> memoryview:
+        if size > len(self.buffer):
+            if size > self.retain_size:
+                return memoryview(bytearray(size))
+            self.buffer = bytearray(min(max(size, 2 * len(self.buffer)), self.retain_size))
+        return memoryview(self.buffer)[:size]
+
+
+def _set_send_timeout(sock: socket.socket, timeout: float):
+    # Pooled sockets stay blocking so their reader can wait for responses indefinitely; SO_SNDTIMEO only
+    # bounds how long a send may stall on a peer that stopped reading.
+    if sys.platform == 'win32':
+        value = struct.pack('L', int(timeout * 1000))
+    else:
+        seconds = int(timeout)
+        value = struct.pack('ll', seconds, int((timeout - seconds) * 1000000))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, value)
+
+
+class PeerConnection:
+    
+    def __init__(self, node: 'NetworkNodeTCP', target_address: str, sock: socket.socket):
+        self.node = node
+        self.target_address = target_address
+        self.sock = sock
+        self.alive = True
+        self.reused = False
+        self.last_used = time.time()
+        self.in_flight_ids: set = set()
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        self.frame_buffer = FrameBuffer()
+        self.reader = threading.Thread(target=self._read_loop, daemon=True)
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self.in_flight_ids)
+    
+    def start(self):
+        self.reader.start()
+    
+    def send(self, request: RequestMessage):
+        with self.lock:
+            if not self.alive:
+                raise ConnectionError(f"Connection to {self.target_address} is closed")
+            self.in_flight_ids.add(request.request_id)
+        try:
+            # A send that times out may have written part of a frame, so the connection is dropped.
+            with self.send_lock:
+                self.node._send_message(self.sock, request)
+        except OSError:
+            with self.lock:
+                self.in_flight_ids.discard(request.request_id)
+            self.close()
+            raise
+        self.last_used = time.time()
+    
+    def _read_loop(self):
+        while self.alive:
+            response = self.node._receive_message(self.sock, self.frame_buffer)
+            if response is None:
+                break
+            with self.lock:
+                self.in_flight_ids.discard(response.request_id)
+            self.last_used = time.time()
+            self.node._handle_response(response)
+        self.close()
+    
+    def close(self):
+        with self.lock:
+            if not self.alive:
+                return
+            self.alive = False
+            orphaned = list(self.in_flight_ids)
+            self.in_flight_ids.clear()
+        
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        
+        self.node._discard_connection(self)
+        for request_id in orphaned:
+            self.node._handle_response(ResponseMessage(
+                sender_address=self.target_address,
+                receiver_address=self.node.address,
+                request_id=request_id,
+                success=False,
+                error=f"Connection to {self.target_address} lost"
+            ))
 
 
 class NetworkNodeTCP:
@@ -18,13 +133,32 @@ class NetworkNodeTCP:
         listen_ip: str = "127.0.0.1",
         listen_port: int = None,
         timeout: float = 5.0,
-        enable_metrics: bool = True
+        enable_metrics: bool = True,
+        max_connections_per_peer: int = 2,
+        max_in_flight_per_connection: int = 256,
+        idle_connection_timeout: float = 30.0,
+        handler_workers: int = 32,
+        max_inflight_requests: int = 256,
+        max_connections: int = 1024,
+        listen_backlog: int = 128,
+        codec: str = "json",
+        max_frame_size: int = 64 * 1024 * 1024,
+        compression: Optional[str] = None,
+        compression_threshold: int = 4096,
+        lookup_cache_size: int = 0,
+        lookup_cache_ttl: Optional[float] = 30.0,
+        lookup_cache_policy: str = "lru",
+        lookup_cache_fresh_for: float = 0.0
     ):
         self.dht_node = dht_node
         self.listen_ip = listen_ip
         self.listen_port = listen_port or dht_node.port
         self.address = f"{listen_ip}:{self.listen_port}"
         self.timeout = timeout
+        self.codec = get_codec(codec)
+        self.max_frame_size = max_frame_size
+        self.compression = check_compression(compression)
+        self.compression_threshold = compression_threshold
         
         self.dht_node.ip = listen_ip
         self.dht_node.port = self.listen_port
@@ -33,14 +167,37 @@ class NetworkNodeTCP:
         self.server_socket: Optional[socket.socket] = None
         self.running = False
         self.server_thread: Optional[threading.Thread] = None
+        self.client_sockets: set = set()
+        self.client_sockets_lock = threading.Lock()
+        
+        self.handler_workers = handler_workers
+        self.max_inflight_requests = max_inflight_requests
+        self.max_connections = max_connections
+        self.listen_backlog = listen_backlog
+        self.request_executor: Optional[ThreadPoolExecutor] = None
+        self.forwarding_executor: Optional[ThreadPoolExecutor] = None
+        self.inflight_requests = 0
+        self.queued_requests = 0
+        self.inflight_lock = threading.Lock()
         
         self.pending_responses: Dict[str, Queue] = {}
         self.response_lock = threading.Lock()
         
         self.metrics = NetworkMetrics(self.address) if enable_metrics else None
         
-        self.connection_cache: Dict[str, socket.socket] = {}
+        self.lookup_cache: Optional[ValueCache] = None
+        if lookup_cache_size:
+            self.lookup_cache = ValueCache(
+                lookup_cache_size, lookup_cache_ttl, lookup_cache_policy, self.metrics, lookup_cache_fresh_for
+            )
+        
+        self.connection_cache: Dict[str, List[PeerConnection]] = {}
+        self.connections_opening: Dict[str, int] = {}
         self.connection_lock = threading.Lock()
+        self.connection_ready = threading.Condition(self.connection_lock)
+        self.max_connections_per_peer = max_connections_per_peer
+        self.max_in_flight_per_connection = max_in_flight_per_connection
+        self.idle_connection_timeout = idle_connection_timeout
         
         self.failed_nodes: Dict[str, float] = {}
         self.failed_nodes_lock = threading.Lock()
@@ -56,39 +213,59 @@ class NetworkNodeTCP:
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server_socket.bind((self.listen_ip, self.listen_port))
-        self.server_socket.listen(10)
+        self.server_socket.listen(self.listen_backlog)
         self.server_socket.settimeout(1.0)
         
+        self.request_executor = self._create_request_executor()
+        self.forwarding_executor = self._create_forwarding_executor()
+        
         self.server_thread = threading.Thread(target=self._server_loop, daemon=True)
         self.server_thread.start()
     
     def stop(self):
+        # Outgoing connections are pooled even when the server was never started, so close them first.
+        self.close_connections()
         if not self.running:
             return
         
         self.running = False
         
-        with self.connection_lock:
-            for conn in self.connection_cache.values():
-                try:
-                    conn.close()
-                except:
-                    pass
-            self.connection_cache.clear()
-        
         if self.server_socket:
             try:
                 self.server_socket.close()
             except:
                 pass
         
+        with self.client_sockets_lock:
+            for client_socket in self.client_sockets:
+                try:
+                    client_socket.shutdown(socket.SHUT_RDWR)
+                except:
+                    pass
+        
         if self.server_thread and self.server_thread.is_alive():
             self.server_thread.join(timeout=2.0)
+        
+        self._shutdown_executors()
+    
+    def close_connections(self):
+        with self.connection_lock:
+            connections = [conn for conns in self.connection_cache.values() for conn in conns]
+            self.connection_cache.clear()
+        for conn in connections:
+            conn.close()
     
     def _server_loop(self):
         while self.running:
             try:
                 client_socket, client_address = self.server_socket.accept()
+                with self.client_sockets_lock:
+                    at_capacity = len(self.client_sockets) >= self.max_connections
+                if at_capacity:
+                    self._close_socket(client_socket)
+                    if self.metrics:
+                        self.metrics.record_rejection(connection=True)
+                    continue
                 client_thread = threading.Thread(
                     target=self._handle_client,
                     args=(client_socket, client_address),
@@ -96,6 +273,7 @@ class NetworkNodeTCP:
                 )
                 client_thread.start()
             except socket.timeout:
+                self.evict_idle_connections()
                 continue
             except Exception as e:
                 if self.running:
@@ -103,63 +281,194 @@ class NetworkNodeTCP:
                 break
     
     def _handle_client(self, client_socket: socket.socket, client_address):
+        with self.client_sockets_lock:
+            self.client_sockets.add(client_socket)
+        
+        write_lock = threading.Lock()
+        frame_buffer = FrameBuffer()
+        
         try:
-            message = self._receive_message(client_socket)
-            if message is None:
-                return
-            
-            if self.metrics:
-                self.metrics.record_message_received(
-                    operation=message.msg_type.value if isinstance(message.msg_type, MessageType) else str(message.msg_type)
-                )
+            client_socket.settimeout(self.idle_connection_timeout * 2)
             
-            if message.msg_type == MessageType.RESPONSE:
-                self._handle_response(message)
-            else:
-                response = self._handle_request(message)
-                self._send_message(client_socket, response)
+            while self.running:
+                frame = self._receive_frame(client_socket, frame_buffer)
+                if frame is None:
+                    return
+                message, codec = frame
+                
+                if self.metrics:
+                    self.metrics.record_message_received(
+                        operation=message.msg_type.value if isinstance(message.msg_type, MessageType) else str(message.msg_type)
+                    )
+                
+                if message.msg_type in (MessageType.RESPONSE, MessageType.BUSY):
+                    self._handle_response(message)
+                elif not self._admit_request():
+                    self._reply(client_socket, write_lock, create_busy_response(message), codec)
+                else:
+                    try:
+                        self._submit_admitted(message, self._serve_request, client_socket, write_lock, message, codec)
+                    except RuntimeError:
+                        return
         
         except Exception as e:
             pass
         
         finally:
+            with self.client_sockets_lock:
+                self.client_sockets.discard(client_socket)
             try:
                 client_socket.close()
             except:
                 pass
     
-    def _receive_message(self, sock: socket.socket) -> Optional[Message]:
+    def _create_request_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self.handler_workers,
+            thread_name_prefix=f"dht-{self.listen_port}"
+        )
+    
+    def _create_forwarding_executor(self) -> ThreadPoolExecutor:
+        # Admission caps in-flight requests at max_inflight_requests, so with that many workers a
+        # forwarding handler never waits in a queue behind handlers blocked on their own nested calls.
+        return ThreadPoolExecutor(
+            max_workers=self.max_inflight_requests,
+            thread_name_prefix=f"dht-{self.listen_port}-fwd"
+        )
+    
+    def _shutdown_executors(self):
+        for executor in (self.request_executor, self.forwarding_executor):
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _submit_admitted(self, request: Message, fn: Callable, *args) -> Future:
+        # Requests that may issue RPCs stay off the bounded pool. If the work never starts (executor
+        # shut down, or its queued future cancelled) the admission taken for it is given back.
+        executor = self.request_executor if request.msg_type in LOCAL_OPERATIONS else self.forwarding_executor
+        future = None
         try:
-            length_data = self._recv_exactly(sock, 4)
-            if not length_data:
+            future = executor.submit(fn, *args)
+        finally:
+            if future is None:
+                self._release_request()
+        future.add_done_callback(self._release_if_cancelled)
+        return future
+    
+    def _release_if_cancelled(self, future: Future):
+        if future.cancelled():
+            self._release_request()
+    
+    def _release_request(self):
+        with self.inflight_lock:
+            self.queued_requests -= 1
+            self.inflight_requests -= 1
+    
+    def _admit_request(self) -> bool:
+        with self.inflight_lock:
+            if self.inflight_requests >= self.max_inflight_requests:
+                admitted = False
+            else:
+                admitted = True
+                self.inflight_requests += 1
+                self.queued_requests += 1
+            depth = self.queued_requests
+        
+        if self.metrics:
+            if admitted:
+                self.metrics.record_queue_depth(depth)
+            else:
+                self.metrics.record_rejection()
+        return admitted
+    
+    def _process_admitted_request(self, request: Message) -> ResponseMessage:
+        with self.inflight_lock:
+            self.queued_requests -= 1
+            depth = self.queued_requests
+        if self.metrics:
+            self.metrics.record_queue_depth(depth)
+        
+        try:
+            return self._handle_request(request)
+        finally:
+            with self.inflight_lock:
+                self.inflight_requests -= 1
+    
+    def _serve_request(self, client_socket: socket.socket, write_lock: threading.Lock, request: Message, codec: Codec):
+        response = self._process_admitted_request(request)
+        self._reply(client_socket, write_lock, response, codec, compress=request.msg_type in BULK_OPERATIONS)
+    
+    def _reply(self, client_socket: socket.socket, write_lock: threading.Lock, response: ResponseMessage, codec: Codec,
+               compress: bool = False):
+        try:
+            with write_lock:
+                self._send_message(client_socket, response, codec, compress)
+        except OSError:
+            pass
+    
+    def _receive_message(self, sock: socket.socket, frame_buffer: Optional[FrameBuffer] = None) -> Optional[Message]:
+        frame = self._receive_frame(sock, frame_buffer)
+        return frame[0] if frame else None
+    
+    def _receive_frame(self, sock: socket.socket, frame_buffer: Optional[FrameBuffer] = None) -> Optional[Tuple[Message, Codec]]:
+        frame_buffer = frame_buffer or FrameBuffer()
+        try:
+            header = memoryview(frame_buffer.header)
+            if not self._recv_exactly(sock, header):
                 return None
             
-            message_length = int.from_bytes(length_data, byteorder='big')
-            
-            message_data = self._recv_exactly(sock, message_length)
-            if not message_data:
+            message_length = int.from_bytes(header, byteorder='big')
+            if message_length == 0 or message_length > self.max_frame_size:
                 return None
             
-            json_str = message_data.decode('utf-8')
-            message = Message.from_json(json_str)
+            body = frame_buffer.view(message_length)
+            if not self._recv_exactly(sock, body):
+                return None
             
-            return message
+            return self._decode_frame_body(body)
         
         except Exception as e:
             return None
     
-    def _recv_exactly(self, sock: socket.socket, num_bytes: int) -> Optional[bytes]:
-        data = b''
-        while len(data) < num_bytes:
-            chunk = sock.recv(num_bytes - len(data))
-            if not chunk:
-                return None
-            data += chunk
-        return data
+    def _recv_exactly(self, sock: socket.socket, view: memoryview) -> bool:
+        received = 0
+        total = len(view)
+        while received < total:
+            count = sock.recv_into(view[received:], total - received)
+            if count == 0:
+                return False
+            received += count
+        return True
+    
+    def _encode_frame(self, message: Message, codec: Optional[Codec] = None, compress: Optional[bool] = None) -> bytes:
+        body = (codec or self.codec).encode(message)
+        
+        if compress is None:
+            compress = message.msg_type in BULK_OPERATIONS
+        if compress and self.compression and len(body) >= self.compression_threshold:
+            original_size = len(body)
+            start = time.perf_counter()
+            packed = compress_body(body, self.compression)
+            if len(packed) < original_size:
+                body = packed
+            if self.metrics:
+                self.metrics.record_compression(original_size, len(body), time.perf_counter() - start)
+        
+        if len(body) > self.max_frame_size:
+            raise ValueError(f"Frame of {len(body)} bytes exceeds max_frame_size {self.max_frame_size}")
+        return frame_body(body)
     
-    def _send_message(self, sock: socket.socket, message: Message):
+    def _decode_frame_body(self, body: memoryview) -> Tuple[Message, Codec]:
+        if is_compressed(body):
+            start = time.perf_counter()
+            body = decompress_body(body, self.max_frame_size)
+            if self.metrics:
+                self.metrics.record_decompression(time.perf_counter() - start)
+        return decode_body(body)
+    
+    def _send_message(self, sock: socket.socket, message: Message, codec: Optional[Codec] = None,
+                      compress: Optional[bool] = None):
         try:
-            message_bytes = message.to_bytes()
+            message_bytes = self._encode_frame(message, codec, compress)
             sock.sendall(message_bytes)
             
             if self.metrics:
@@ -195,12 +504,29 @@ class NetworkNodeTCP:
             if request_id in self.pending_responses:
                 self.pending_responses[request_id].put(response)
     
-    def ping(self, target_address: str, timeout: Optional[float] = None) -> bool:
+    def _cached_lookup(self, key: str, lookup: Callable[[str], Any],
+                       group: Callable[[List[str]], Dict[Any, List[str]]]) -> Any:
+        if self.lookup_cache is None:
+            return lookup(key)
+        return self.lookup_cache.fetch(key, group)
+    
+    def _cached_multi_lookup(self, keys: List[str], multi_lookup: Callable[[List[str]], Dict[str, Any]],
+                             group: Callable[[List[str]], Dict[Any, List[str]]]) -> Dict[str, Any]:
+        if self.lookup_cache is None:
+            return multi_lookup(keys)
+        return self.lookup_cache.fetch_many(keys, group)
+    
+    def _invalidate_cached(self, keys: Iterable[str]):
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate_many(keys)
+    
+    def ping(self, target_address: str, timeout: Optional[float] = None, retries: Optional[int] = None) -> bool:
         try:
             self.send_request(
                 target_address,
                 MessageType.PING,
-                timeout=timeout or self.timeout
+                timeout=timeout or self.timeout,
+                retries=retries
             )
             with self.failed_nodes_lock:
                 self.failed_nodes.pop(target_address, None)
@@ -274,6 +600,9 @@ class NetworkNodeTCP:
                             success=response.success
                         )
                     
+                    if response.msg_type == MessageType.BUSY:
+                        raise NodeBusyError(f"{target_address} is overloaded: {response.error}")
+                    
                     if not response.success:
                         raise Exception(f"Remote error: {response.error}")
                     
@@ -288,29 +617,116 @@ class NetworkNodeTCP:
                 last_exception = e
                 if attempt < actual_retries:
                     time.sleep(self.retry_delay * (2 ** attempt))
-                else:
+                elif not isinstance(e, NodeBusyError):
                     self.mark_node_failed(target_address)
         
         raise last_exception
     
+    def stream_chunks(
+        self,
+        target_address: str,
+        operation: MessageType,
+        *args,
+        cursor: Any = None,
+        chunk_size: int = 1000,
+        timeout: Optional[float] = None
+    ) -> Iterator[Tuple[List[Tuple[Any, Any]], Any]]:
+        # One chunk in flight at a time; pass a yielded cursor back in to resume after a failure.
+        while True:
+            chunk = self.send_request(target_address, operation, *args, cursor=cursor, limit=chunk_size, timeout=timeout)
+            cursor = chunk['cursor']
+            yield [tuple(item) for item in chunk['items']], cursor
+            if cursor is None:
+                return
+    
+    def push_chunks(
+        self,
+        target_address: str,
+        items: Iterable[Tuple[Any, Any]],
+        chunk_size: int = 1000,
+        offset: int = 0,
+        timeout: Optional[float] = None
+    ) -> Iterator[int]:
+        # Yields the number of items acknowledged so far; pass it back as offset to resume.
+        items = islice(items, offset, None)
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                return
+            self.send_request(target_address, MessageType.TRANSFER_KEYS, chunk, timeout=timeout)
+            offset += len(chunk)
+            yield offset
+    
     def _send_request_to_node(self, target_address: str, request: RequestMessage):
-        parts = target_address.split(':')
-        target_ip = parts[0]
-        target_port = int(parts[1])
-        
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(self.timeout)
-        
+        conn = self._acquire_connection(target_address)
         try:
-            sock.connect((target_ip, target_port))
-            self._send_message(sock, request)
-            
-            response = self._receive_message(sock)
-            if response:
-                self._handle_response(response)
+            conn.send(request)
+        except OSError:
+            if not conn.reused:
+                raise
+            conn = self._acquire_connection(target_address, fresh=True)
+            conn.send(request)
+    
+    def _acquire_connection(self, target_address: str, fresh: bool = False) -> 'PeerConnection':
+        # A slot is reserved under the lock before connecting, so concurrent callers never open more than
+        # max_connections_per_peer sockets to one peer. fresh skips reuse only while a slot is free.
+        with self.connection_ready:
+            while True:
+                conns = self.connection_cache.setdefault(target_address, [])
+                conns[:] = [conn for conn in conns if conn.alive]
+                opening = self.connections_opening.get(target_address, 0)
+                has_slot = len(conns) + opening < self.max_connections_per_peer
+                if conns and not (fresh and has_slot):
+                    conn = min(conns, key=lambda c: c.in_flight)
+                    if conn.in_flight < self.max_in_flight_per_connection or not has_slot:
+                        conn.reused = True
+                        conn.last_used = time.time()
+                        if self.metrics:
+                            self.metrics.record_connection(reused=True)
+                        return conn
+                if has_slot:
+                    self.connections_opening[target_address] = opening + 1
+                    break
+                self.connection_ready.wait(self.timeout)
         
+        conn = None
+        try:
+            parts = target_address.split(':')
+            sock = socket.create_connection((parts[0], int(parts[1])), timeout=self.timeout)
+            sock.settimeout(None)
+            _set_send_timeout(sock, self.timeout)
+            conn = PeerConnection(self, target_address, sock)
         finally:
-            sock.close()
+            with self.connection_ready:
+                remaining = self.connections_opening[target_address] - 1
+                if remaining:
+                    self.connections_opening[target_address] = remaining
+                else:
+                    del self.connections_opening[target_address]
+                if conn is not None:
+                    self.connection_cache.setdefault(target_address, []).append(conn)
+                self.connection_ready.notify_all()
+        
+        if self.metrics:
+            self.metrics.record_connection(reused=False)
+        conn.start()
+        return conn
+    
+    def _discard_connection(self, conn: 'PeerConnection'):
+        with self.connection_lock:
+            conns = self.connection_cache.get(conn.target_address)
+            if conns and conn in conns:
+                conns.remove(conn)
+    
+    def evict_idle_connections(self):
+        now = time.time()
+        with self.connection_lock:
+            idle = [
+                conn for conns in self.connection_cache.values() for conn in conns
+                if conn.in_flight == 0 and now - conn.last_used >= self.idle_connection_timeout
+            ]
+        for conn in idle:
+            conn.close()
     
     def __enter__(self):
         self.start()
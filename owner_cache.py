@@ -0,0 +1,92 @@
+import random
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from dht_hash import DHTHasher
+
+
+class OwnerCache:
+    # Maps disjoint ring intervals (start, end] to the node that owns them, kept sorted by end id.
+    
+    def __init__(self, hasher: DHTHasher, max_entries: int = 4096):
+        self.hasher = hasher
+        self.max_entries = max_entries
+        self._ends: List[int] = []
+        self._entries: List[Tuple[int, Any]] = []
+        self.lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def __len__(self) -> int:
+        return len(self._ends)
+    
+    def _find(self, key_id: int) -> Optional[int]:
+        if not self._ends:
+            return None
+        i = bisect_left(self._ends, key_id)
+        if i == len(self._ends):
+            i = 0
+        start, _ = self._entries[i]
+        if self.hasher.in_range(key_id, start, self._ends[i]):
+            return i
+        return None
+    
+    def get(self, key_id: int) -> Optional[Any]:
+        with self.lock:
+            i = self._find(key_id)
+            if i is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._entries[i][1]
+    
+    def put(self, start_id: int, end_id: int, owner: Any):
+        with self.lock:
+            keep = [
+                (end, (start, node)) for end, (start, node) in zip(self._ends, self._entries)
+                if not self.hasher.in_range(end, start_id, end_id) and not self.hasher.in_range(end_id, start, end)
+            ]
+            if len(keep) >= self.max_entries:
+                keep.pop(random.randrange(len(keep)))
+            
+            i = bisect_left([end for end, _ in keep], end_id)
+            keep.insert(i, (end_id, (start_id, owner)))
+            self._ends = [end for end, _ in keep]
+            self._entries = [entry for _, entry in keep]
+    
+    def invalidate(self, key_id: int):
+        with self.lock:
+            i = self._find(key_id)
+            if i is not None:
+                del self._ends[i]
+                del self._entries[i]
+                self.invalidations += 1
+    
+    def node_joined(self, node_id: int):
+        # The new node takes over the low part of whichever interval contains its id.
+        self.invalidate(node_id)
+    
+    def node_left(self, node: Any):
+        with self.lock:
+            keep = [i for i, (_, owner) in enumerate(self._entries) if owner is not node]
+            self.invalidations += len(self._ends) - len(keep)
+            self._ends = [self._ends[i] for i in keep]
+            self._entries = [self._entries[i] for i in keep]
+    
+    def clear(self):
+        with self.lock:
+            self._ends = []
+            self._entries = []
+    
+    def stats(self) -> Dict[str, int]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._ends),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / total if total else 0.0
+        }
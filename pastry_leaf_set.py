@@ -0,0 +1,108 @@
+from bisect import bisect_left
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+class LeafSet:
+    # The `half` nearest nodes on each side of the owner around the ring, each side sorted by ring
+    # distance from the owner (nearest first). Members plus the owner are also kept in a sorted id
+    # list so the node responsible for a key can be found by bisection.
+    
+    __slots__ = ('owner', 'ring_size', 'half', 'smaller', 'larger', '_smaller_dist', '_larger_dist',
+                 '_members', '_ring_ids', '_ring_nodes')
+    
+    def __init__(self, owner: Any, ring_size: int, half: int):
+        self.owner = owner
+        self.ring_size = ring_size
+        self.half = half
+        self.clear()
+    
+    def __len__(self) -> int:
+        return len(self._members)
+    
+    def __contains__(self, node: Any) -> bool:
+        return node.id in self._members
+    
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.nodes())
+    
+    def nodes(self) -> List[Any]:
+        smaller_ids = {node.id for node in self.smaller}
+        return self.smaller + [node for node in self.larger if node.id not in smaller_ids]
+    
+    def add(self, node: Any) -> bool:
+        if node.id == self.owner.id or node.id in self._members:
+            return False
+        
+        offset = (node.id - self.owner.id) % self.ring_size
+        added_larger, evicted_larger = self._insert(self.larger, self._larger_dist, node, offset)
+        added_smaller, evicted_smaller = self._insert(self.smaller, self._smaller_dist, node, self.ring_size - offset)
+        if not (added_larger or added_smaller):
+            return False
+        
+        self._members[node.id] = node
+        i = bisect_left(self._ring_ids, node.id)
+        self._ring_ids.insert(i, node.id)
+        self._ring_nodes.insert(i, node)
+        
+        for evicted in (evicted_larger, evicted_smaller):
+            if evicted is not None and not self._on_either_side(evicted.id):
+                self._drop(evicted.id)
+        return True
+    
+    def _insert(self, nodes: List[Any], dists: List[int], node: Any, dist: int) -> Tuple[bool, Optional[Any]]:
+        i = bisect_left(dists, dist)
+        if i >= self.half:
+            return (False, None)
+        
+        dists.insert(i, dist)
+        nodes.insert(i, node)
+        if len(nodes) > self.half:
+            dists.pop()
+            return (True, nodes.pop())
+        return (True, None)
+    
+    def _on_either_side(self, node_id: int) -> bool:
+        return any(node.id == node_id for node in self.smaller) or any(node.id == node_id for node in self.larger)
+    
+    def remove(self, node: Any) -> bool:
+        if node.id not in self._members:
+            return False
+        
+        for nodes, dists in ((self.smaller, self._smaller_dist), (self.larger, self._larger_dist)):
+            for i, member in enumerate(nodes):
+                if member.id == node.id:
+                    del nodes[i]
+                    del dists[i]
+                    break
+        self._drop(node.id)
+        return True
+    
+    def _drop(self, node_id: int):
+        del self._members[node_id]
+        i = bisect_left(self._ring_ids, node_id)
+        del self._ring_ids[i]
+        del self._ring_nodes[i]
+    
+    def clear(self):
+        self.smaller = []
+        self.larger = []
+        self._smaller_dist = []
+        self._larger_dist = []
+        self._members = {}
+        self._ring_ids = [self.owner.id]
+        self._ring_nodes = [self.owner]
+    
+    def covers(self, key_id: int) -> bool:
+        if not self.smaller or not self.larger:
+            return True
+        
+        # When every known node fits on both sides the two halves overlap and span the whole ring.
+        span = self._smaller_dist[-1] + self._larger_dist[-1]
+        if span >= self.ring_size:
+            return True
+        return (key_id - self.smaller[-1].id) % self.ring_size <= span
+    
+    def closest(self, key_id: int) -> Any:
+        # The owner or member reached first going clockwise from key_id.
+        i = bisect_left(self._ring_ids, key_id % self.ring_size)
+        return self._ring_nodes[i if i < len(self._ring_nodes) else 0]
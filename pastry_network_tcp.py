@@ -1,7 +1,9 @@
-from typing import Optional, Any, Dict, List, Tuple
+from typing import Optional, Any, Dict, Iterable, Iterator, List, Tuple
 
 from pastry_node import PastryNode
+from proximity import MeasuredLatency
 from network_node_tcp import NetworkNodeTCP
+from async_network_node_tcp import AsyncNetworkNodeTCP
 from message_protocol import (
     Message, RequestMessage, ResponseMessage, MessageType,
     create_response
@@ -18,20 +20,39 @@ class PastryNetworkNode(NetworkNodeTCP):
         l: int = 16,
         m: int = 32,
         timeout: float = 5.0,
-        enable_metrics: bool = True
+        enable_metrics: bool = True,
+        tree_order: int = 10,
+        codec: str = "json",
+        compression: Optional[str] = None,
+        lookup_cache_size: int = 0,
+        lookup_cache_ttl: Optional[float] = 30.0,
+        lookup_cache_policy: str = "lru",
+        lookup_cache_fresh_for: float = 0.0,
+        proximity_routing: bool = False,
+        probe_timeout: float = 1.0
     ):
-        pastry_node = PastryNode(ip=ip, port=port, m_bits=m_bits, b=b, l=l, m=m)
+        pastry_node = PastryNode(ip=ip, port=port, m_bits=m_bits, b=b, l=l, m=m, tree_order=tree_order)
         
         super().__init__(
             dht_node=pastry_node,
             listen_ip=ip,
             listen_port=port,
             timeout=timeout,
-            enable_metrics=enable_metrics
+            enable_metrics=enable_metrics,
+            codec=codec,
+            compression=compression,
+            lookup_cache_size=lookup_cache_size,
+            lookup_cache_ttl=lookup_cache_ttl,
+            lookup_cache_policy=lookup_cache_policy,
+            lookup_cache_fresh_for=lookup_cache_fresh_for
         )
         
         self.pastry_node: PastryNode = pastry_node
         self.remote_nodes: Dict[str, 'RemotePastryNode'] = {}
+        if proximity_routing:
+            pastry_node.latency_model = MeasuredLatency(
+                lambda address: self.ping(address, timeout=probe_timeout, retries=0)
+            )
     
     def get_remote_node(self, address: str) -> 'RemotePastryNode':
         if address not in self.remote_nodes:
@@ -49,36 +70,110 @@ class PastryNetworkNode(NetworkNodeTCP):
             if operation == MessageType.ROUTE:
                 key_id = args[0] if args else kwargs.get('key_id')
                 hops = args[1] if len(args) > 1 else kwargs.get('hops', 0)
-                result_node, hop_count = self.pastry_node.route(key_id, hops)
+                visited = args[2] if len(args) > 2 else kwargs.get('visited')
+                path = kwargs.get('path')
+                result_node, hop_count = self.pastry_node.route(key_id, hops, set(visited) if visited else None, path)
                 result = {
                     'node': self._serialize_node(result_node),
                     'hops': hop_count
                 }
+                if path is not None:
+                    result['path'] = path
                 return create_response(request, result=result, success=True)
             
             elif operation == MessageType.INSERT:
                 key = args[0] if args else kwargs.get('key')
                 value = args[1] if len(args) > 1 else kwargs.get('value')
                 success, hops = self.pastry_node.insert(key, value)
+                self._invalidate_cached([key])
                 result = {'success': success, 'hops': hops}
                 return create_response(request, result=result, success=True)
             
             elif operation == MessageType.LOOKUP:
                 key = args[0] if args else kwargs.get('key')
-                value, hops = self.pastry_node.lookup(key)
+                hops = 0
+                
+                def lookup(key: str) -> Any:
+                    nonlocal hops
+                    value, hops = self.pastry_node.lookup(key)
+                    return value
+                
+                def group(keys: List[str]) -> Dict[Any, List[str]]:
+                    nonlocal hops
+                    groups, hops = self.pastry_node._group_by_owner(keys)
+                    return groups
+                
+                value = self._cached_lookup(key, lookup, group)
                 result = {'value': value, 'hops': hops}
                 return create_response(request, result=result, success=True)
             
             elif operation == MessageType.DELETE:
                 key = args[0] if args else kwargs.get('key')
                 success, hops = self.pastry_node.delete(key)
+                self._invalidate_cached([key])
                 result = {'success': success, 'hops': hops}
                 return create_response(request, result=result, success=True)
             
+            elif operation == MessageType.MULTI_INSERT:
+                items = args[0] if args else kwargs.get('items')
+                items = dict(items)
+                count, hops = self.pastry_node.multi_insert(items.items())
+                self._invalidate_cached(items)
+                result = {'count': count, 'hops': hops}
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.MULTI_LOOKUP:
+                keys = args[0] if args else kwargs.get('keys')
+                hops = 0
+                
+                def multi_lookup(keys: List[str]) -> Dict[str, Any]:
+                    nonlocal hops
+                    values, hops = self.pastry_node.multi_lookup(keys)
+                    return values
+                
+                def group(keys: List[str]) -> Dict[Any, List[str]]:
+                    nonlocal hops
+                    groups, hops = self.pastry_node._group_by_owner(keys)
+                    return groups
+                
+                values = self._cached_multi_lookup(keys, multi_lookup, group)
+                result = {'values': values, 'hops': hops}
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.MULTI_DELETE:
+                keys = args[0] if args else kwargs.get('keys')
+                count, hops = self.pastry_node.multi_delete(keys)
+                self._invalidate_cached(keys)
+                result = {'count': count, 'hops': hops}
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.TRANSFER_KEYS:
+                keys_data = args[0] if args else kwargs.get('keys_data')
+                keys_data = dict(keys_data)
+                self.pastry_node.accept_keys(keys_data.items())
+                self._invalidate_cached(keys_data)
+                return create_response(request, result=True, success=True)
+            
+            elif operation == MessageType.FETCH_KEYS:
+                keys = args[0] if args else kwargs.get('keys')
+                return create_response(request, result=self.pastry_node.fetch_keys(keys), success=True)
+            
+            elif operation == MessageType.FETCH_VERSIONED:
+                keys = args[0] if args else kwargs.get('keys')
+                known = args[1] if len(args) > 1 else kwargs.get('known')
+                return create_response(request, result=self.pastry_node.fetch_versioned(keys, known), success=True)
+            
+            elif operation == MessageType.RELEASE_KEYS:
+                keys = args[0] if args else kwargs.get('keys')
+                result = self.pastry_node.release_keys(keys)
+                self._invalidate_cached(keys)
+                return create_response(request, result=result, success=True)
+            
             elif operation == MessageType.UPDATE:
                 key = args[0] if args else kwargs.get('key')
                 value = args[1] if len(args) > 1 else kwargs.get('value')
                 success, hops = self.pastry_node.update(key, value)
+                self._invalidate_cached([key])
                 result = {'success': success, 'hops': hops}
                 return create_response(request, result=result, success=True)
             
@@ -96,7 +191,10 @@ class PastryNetworkNode(NetworkNodeTCP):
                 return create_response(request, result=result, success=True)
             
             elif operation == MessageType.GET_DATA:
-                return create_response(request, result=dict(self.pastry_node.data), success=True)
+                if 'limit' in kwargs:
+                    items, cursor = self.pastry_node.data.read_chunk(kwargs.get('cursor'), kwargs['limit'])
+                    return create_response(request, result={'items': items, 'cursor': cursor}, success=True)
+                return create_response(request, result=dict(self.pastry_node.data.iter_items()), success=True)
             
             elif operation == MessageType.ADD_NODE:
                 node_data = args[0] if args else kwargs.get('node')
@@ -109,7 +207,18 @@ class PastryNetworkNode(NetworkNodeTCP):
                 return create_response(request, result=True, success=True)
             
             elif operation == MessageType.GET_REPLICAS:
-                return create_response(request, result=dict(self.pastry_node.replicas), success=True)
+                if 'limit' in kwargs:
+                    items, cursor = self.pastry_node.replicas.read_chunk(kwargs.get('cursor'), kwargs['limit'])
+                    return create_response(request, result={'items': items, 'cursor': cursor}, success=True)
+                return create_response(request, result=dict(self.pastry_node.replicas.iter_items()), success=True)
+            
+            elif operation == MessageType.RANGE_QUERY:
+                result = self.pastry_node.local_range_query_sorted(*args, **kwargs)
+                return create_response(request, result=result, success=True)
+            
+            elif operation == MessageType.DISTRIBUTED_RANGE_QUERY:
+                result = self.pastry_node.distributed_range_query(*args, **kwargs)
+                return create_response(request, result=result, success=True)
             
             else:
                 return create_response(
@@ -144,10 +253,28 @@ class PastryNetworkNode(NetworkNodeTCP):
     def update(self, key: str, value: Any) -> Tuple[bool, int]:
         return self.pastry_node.update(key, value)
     
+    def multi_insert(self, items) -> Tuple[int, int]:
+        return self.pastry_node.multi_insert(items)
+    
+    def multi_lookup(self, keys: Iterable[str]) -> Tuple[Dict[str, Any], int]:
+        return self.pastry_node.multi_lookup(keys)
+    
+    def multi_delete(self, keys: Iterable[str]) -> Tuple[int, int]:
+        return self.pastry_node.multi_delete(keys)
+    
+    def distributed_range_query(self, attr_name: str, min_val, max_val, limit: Optional[int] = None,
+                                order_by: Optional[str] = None) -> List[Any]:
+        return self.pastry_node.distributed_range_query(attr_name, min_val, max_val, limit=limit, order_by=order_by)
+    
     def __repr__(self):
         return f"<PastryNetworkNode {self.address} ID:{self.pastry_node.hex_id[:8]}...>"
 
 
+class AsyncPastryNetworkNode(AsyncNetworkNodeTCP, PastryNetworkNode):
+    def __repr__(self):
+        return f"<AsyncPastryNetworkNode {self.address} ID:{self.pastry_node.hex_id[:8]}...>"
+
+
 class RemotePastryNode:
     def __init__(self, address: str, local_node: PastryNetworkNode):
         self.address = address
@@ -205,28 +332,62 @@ class RemotePastryNode:
         return []
 
     @property
-    def routing_table(self) -> Dict[int, Dict[int, 'RemotePastryNode']]:
+    def routing_table(self) -> List['RemotePastryNode']:
         
-        return {}
+        return []
 
     @property
     def data(self) -> Dict[str, Any]:
         
         try:
-            return self.local_node.send_request(
-                self.address,
-                MessageType.GET_DATA
-            )
+            return dict(self.iter_data())
         except:
             return {}
     
-    def route(self, key_id: int, hops: int = 0, visited: Optional[set] = None) -> Tuple['RemotePastryNode', int]:
+    def iter_data(self, chunk_size: int = 1000) -> Iterator[Tuple[str, Any]]:
+        for items, _ in self.local_node.stream_chunks(self.address, MessageType.GET_DATA, chunk_size=chunk_size):
+            yield from items
+    
+    def accept_keys(self, items: Iterable[Tuple[str, Any]]):
+        for _ in self.local_node.push_chunks(self.address, items):
+            pass
+    
+    def fetch_keys(self, keys: Iterable[str]) -> Dict[str, Any]:
+        return self.local_node.send_request(
+            self.address,
+            MessageType.FETCH_KEYS,
+            list(keys)
+        )
+    
+    def fetch_versioned(self, keys: Iterable[str], known: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        result = self.local_node.send_request(
+            self.address,
+            MessageType.FETCH_VERSIONED,
+            list(keys),
+            known or {}
+        )
+        return {key: tuple(record) if record is not None else None for key, record in result.items()}
+    
+    def release_keys(self, keys: Iterable[str]) -> int:
+        return self.local_node.send_request(
+            self.address,
+            MessageType.RELEASE_KEYS,
+            list(keys)
+        )
+    
+    def route(self, key_id: int, hops: int = 0, visited: Optional[set] = None,
+              path: Optional[List[str]] = None) -> Tuple['RemotePastryNode', int]:
+        kwargs = {'path': path} if path is not None else {}
         result = self.local_node.send_request(
             self.address,
             MessageType.ROUTE,
             key_id,
-            hops
+            hops,
+            list(visited) if visited else None,
+            **kwargs
         )
+        if path is not None:
+            path[:] = result.get('path', path)
         
         node_data = result['node']
         hop_count = result['hops']
@@ -247,5 +408,17 @@ class RemotePastryNode:
             for node_data in result
         ]
     
+    def local_range_query_sorted(self, attr_name: str, min_val, max_val,
+                                 limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Any]:
+        return self.local_node.send_request(
+            self.address,
+            MessageType.RANGE_QUERY,
+            attr_name,
+            min_val,
+            max_val,
+            limit,
+            order_by
+        )
+    
     def __repr__(self):
         return f"<RemotePastryNode {self.address} ID:{self._hex_id[:8] if self._hex_id else '?'}...>"
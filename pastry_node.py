@@ -1,9 +1,13 @@
-from typing import List, Optional, Dict
+from typing import Any, Iterable, List, Optional, Dict
 from dht_hash import DHTHasher
-from bplus_tree import BPlusTree
+from bplus_tree import IndexedBPlusTree, DEFAULT_INDEXED_FIELDS
+from pastry_routing_table import RoutingTable
+from pastry_leaf_set import LeafSet
+from distributed_query import fan_out_range_query, local_sorted_range
 
 class PastryNode:
-    def __init__(self, ip: str, port: int, m_bits: int = 160, b: int = 4, l: int = 16, m: int = 32):
+    def __init__(self, ip: str, port: int, m_bits: int = 160, b: int = 4, l: int = 16, m: int = 32, tree_order: int = 10,
+                 indexed_fields: Iterable[str] = DEFAULT_INDEXED_FIELDS, latency_model: Any = None):
 
         self.ip = ip
         self.port = port
@@ -18,25 +22,34 @@ class PastryNode:
         self.leaf_set_size = l
         self.neighborhood_size = m
 
-        self.leaf_smaller: List['PastryNode'] = []
-        self.leaf_larger: List['PastryNode'] = []
+        self.leaf_set = LeafSet(self, 2 ** m_bits, l // 2)
         self.neighborhood_set: List['PastryNode'] = []
         self.num_rows = self.m_bits // self.b
-        self.routing_table: Dict[int, Dict[int, 'PastryNode']] = {}
+        self.routing_table = RoutingTable(self.id, m_bits, b)
+        self.latency_model = latency_model
         
-        self.data = BPlusTree(order=10)
-        self.replicas = BPlusTree(order=10) 
+        self.tree_order = tree_order
+        self.data = IndexedBPlusTree(order=tree_order, indexed_fields=indexed_fields,
+                                     key_hasher=self.hasher.hash_key)
+        self.replicas = IndexedBPlusTree(order=tree_order, indexed_fields=(),
+                                         key_hasher=self.hasher.hash_key)
 
     def __repr__(self):
         return f"<PastryNode {self.address} ID:{self.hex_id[:8]}...>"
 
-    def _shared_prefix_length(self, other_id_hex: str) -> int:
+    @property
+    def leaf_smaller(self) -> List['PastryNode']:
 
-        length = 0
-        min_len = min(len(self.hex_id), len(other_id_hex))
-        while length < min_len and self.hex_id[length] == other_id_hex[length]:
-            length += 1
-        return length
+        return self.leaf_set.smaller
+
+    @property
+    def leaf_larger(self) -> List['PastryNode']:
+
+        return self.leaf_set.larger
+
+    def _shared_prefix_length(self, other_id: int) -> int:
+
+        return self.routing_table.shared_prefix(self.id, other_id)
 
     def add_node(self, node: 'PastryNode'):
 
@@ -49,41 +62,25 @@ class PastryNode:
 
     def _update_leaf_set(self, node: 'PastryNode'):
 
-        if node.id < self.id:
-
-            if node not in self.leaf_smaller:
-                self.leaf_smaller.append(node)
-
-                self.leaf_smaller.sort(key=lambda x: x.id, reverse=True)
-
-                if len(self.leaf_smaller) > self.leaf_set_size // 2:
-                    self.leaf_smaller = self.leaf_smaller[:self.leaf_set_size // 2]
-        else:
-
-            if node not in self.leaf_larger:
-                self.leaf_larger.append(node)
-
-                self.leaf_larger.sort(key=lambda x: x.id)
- 
-                if len(self.leaf_larger) > self.leaf_set_size // 2:
-                    self.leaf_larger = self.leaf_larger[:self.leaf_set_size // 2]
+        self.leaf_set.add(node)
 
     def _update_routing_table(self, node: 'PastryNode'):
-        sh_len = self._shared_prefix_length(node.hex_id)
+        slot = self.routing_table.slot(node.id)
         
 
-        if sh_len >= self.num_rows:
+        if slot is None:
             return
 
-        digit = int(node.hex_id[sh_len], 16) 
-        
-        if sh_len not in self.routing_table:
-            self.routing_table[sh_len] = {}
-            
-        if digit not in self.routing_table[sh_len]:
-            self.routing_table[sh_len][digit] = node
-        else:
-            pass
+        current = self.routing_table.get(*slot)
+        if current is None:
+            self.routing_table.put(*slot, node)
+        elif self.latency_model is not None:
+            if current is not node and self.proximity(node) < self.proximity(current):
+                self.routing_table.put(*slot, node)
+
+    def proximity(self, node: 'PastryNode') -> float:
+
+        return self.latency_model.rtt(self.address, node.address)
 
     def _update_neighborhood_set(self, node: 'PastryNode'):
 
@@ -91,84 +88,64 @@ class PastryNode:
             self.neighborhood_set.append(node)
 
             if len(self.neighborhood_set) > self.neighborhood_size:
-                self.neighborhood_set.pop(0) 
+                if self.latency_model is not None:
+                    self.neighborhood_set.remove(max(self.neighborhood_set, key=self.proximity))
+                else:
+                    self.neighborhood_set.pop(0) 
     def get_leaf_set(self) -> List['PastryNode']:
 
-        return self.leaf_smaller + self.leaf_larger
+        return self.leaf_set.nodes()
 
     def is_in_leaf_set_range(self, key_id: int) -> bool:
 
-        if not self.leaf_smaller and not self.leaf_larger:
-            return True
-        
-        min_id = self.leaf_smaller[0].id if self.leaf_smaller else self.id
-        max_id = self.leaf_larger[-1].id if self.leaf_larger else self.id
-        
-        if min_id <= max_id:
-            return min_id <= key_id <= max_id
-        else:
-            return key_id >= min_id or key_id <= max_id
+        return self.leaf_set.covers(key_id)
 
     def find_closest_in_leaf_set(self, key_id: int) -> 'PastryNode':
 
-        candidates = self.get_leaf_set() + [self]
-        
-        def distance(node_id: int) -> int:
-
-            if node_id >= key_id:
-                return node_id - key_id
-            else:
-                return (2 ** self.m_bits) - key_id + node_id
-        
-        return min(candidates, key=lambda n: distance(n.id))
+        return self.leaf_set.closest(key_id)
 
-    def route(self, key_id: int, hops: int = 0, visited: Optional[set] = None) -> tuple['PastryNode', int]:
+    def route(self, key_id: int, hops: int = 0, visited: Optional[set] = None,
+              path: Optional[List[str]] = None) -> tuple['PastryNode', int]:
         if visited is None:
             visited = set()
         if self.id in visited or hops > 100:
             return (self, hops)
         visited.add(self.id)
-        key_hex = self.hasher.get_hex_id(key_id, digits=self.m_bits//4)
-        shared_prefix = self._shared_prefix_length(key_hex)
+        if path is not None:
+            path.append(self.address)
+        table = self.routing_table
+        shared_prefix = self._shared_prefix_length(key_id)
         if self.is_in_leaf_set_range(key_id):
             closest = self.find_closest_in_leaf_set(key_id)
             if closest is self:
                 return (self, hops)
             if closest.id not in visited:
-                return closest.route(key_id, hops + 1, visited)
+                return closest.route(key_id, hops + 1, visited, path)
             return (self, hops)
-        if shared_prefix < self.num_rows:
-            next_digit = int(key_hex[shared_prefix], 16)
-            if shared_prefix in self.routing_table and next_digit in self.routing_table[shared_prefix]:
-                next_node = self.routing_table[shared_prefix][next_digit]
-                if next_node.id not in visited:
-                    return next_node.route(key_id, hops + 1, visited)
-            for digit in range(self.base):
-                if shared_prefix in self.routing_table and digit in self.routing_table[shared_prefix]:
-                    candidate = self.routing_table[shared_prefix][digit]
-                    if candidate.id not in visited:
-                        candidate_key_prefix = self._shared_prefix_length_between(candidate.hex_id, key_hex)
-                        if candidate_key_prefix > shared_prefix:
-                            return candidate.route(key_id, hops + 1, visited)
+        if shared_prefix < self.num_rows and table.row_counts[shared_prefix]:
+            next_node = table.get(shared_prefix, table.digit(key_id, shared_prefix))
+            if next_node is not None and next_node.id not in visited:
+                return next_node.route(key_id, hops + 1, visited, path)
+            for candidate in table.row(shared_prefix):
+                if candidate is not None and candidate.id not in visited:
+                    candidate_key_prefix = self._shared_prefix_length_between(candidate.id, key_id)
+                    if candidate_key_prefix > shared_prefix:
+                        return candidate.route(key_id, hops + 1, visited, path)
         for row_idx in range(shared_prefix + 1, self.num_rows):
-            if row_idx in self.routing_table:
-                for digit, node in self.routing_table[row_idx].items():
-                    if node.id not in visited:
-                        node_key_prefix = self._shared_prefix_length_between(node.hex_id, key_hex)
+            if table.row_counts[row_idx]:
+                for node in table.row(row_idx):
+                    if node is not None and node.id not in visited:
+                        node_key_prefix = self._shared_prefix_length_between(node.id, key_id)
                         if node_key_prefix > shared_prefix:
-                            return node.route(key_id, hops + 1, visited)
+                            return node.route(key_id, hops + 1, visited, path)
         closest_leaf = self.find_closest_in_leaf_set(key_id)
         if closest_leaf is not self and closest_leaf.id not in visited:
-            return closest_leaf.route(key_id, hops + 1, visited)
+            return closest_leaf.route(key_id, hops + 1, visited, path)
         return (self, hops)
 
-    def _shared_prefix_length_between(self, hex_id1: str, hex_id2: str) -> int:
+    def _shared_prefix_length_between(self, id1: int, id2: int) -> int:
 
-        length = 0
-        min_len = min(len(hex_id1), len(hex_id2))
-        while length < min_len and hex_id1[length] == hex_id2[length]:
-            length += 1
-        return length
+        return self.routing_table.shared_prefix(id1, id2)
 
     def insert(self, key: str, value) -> tuple[bool, int]:
 
@@ -197,6 +174,71 @@ class PastryNode:
 
         return self.insert(key, value)
 
+    def accept_keys(self, items) -> None:
+
+        items = dict(items)
+        if len(self.data) <= len(items):
+            self.data.bulk_load(sorted(items.items()))
+        else:
+            for key, value in items.items():
+                self.data[key] = value
+
+    def fetch_keys(self, keys: Iterable[str]) -> Dict[str, Any]:
+
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    def fetch_versioned(self, keys: Iterable[str], known: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+
+        return self.data.fetch_versioned(keys, known)
+
+    def release_keys(self, keys: Iterable[str]) -> int:
+
+        released = 0
+        for key in keys:
+            if key in self.data:
+                del self.data[key]
+                released += 1
+        return released
+
+    def _group_by_owner(self, keys: Iterable[str]) -> tuple[Dict['PastryNode', List[str]], int]:
+
+        hops = 0
+
+        def locate(key_id: int) -> 'PastryNode':
+            nonlocal hops
+            node, route_hops = self.route(key_id)
+            hops += route_hops
+            return node
+
+        def predecessor_id(owner: 'PastryNode') -> Optional[int]:
+            if getattr(owner, 'leaf_smaller', None):
+                return owner.leaf_smaller[0].id
+            return None
+
+        return self.hasher.group_by_successor(keys, locate, predecessor_id), hops
+
+    def multi_insert(self, items) -> tuple[int, int]:
+
+        items = dict(items)
+        groups, hops = self._group_by_owner(items)
+        for owner, keys in groups.items():
+            owner.accept_keys([(key, items[key]) for key in keys])
+        return (len(items), hops)
+
+    def multi_lookup(self, keys: Iterable[str]) -> tuple[Dict[str, Any], int]:
+
+        results = {}
+        groups, hops = self._group_by_owner(keys)
+        for owner, owned in groups.items():
+            found = owner.fetch_keys(owned)
+            results.update((key, found.get(key)) for key in owned)
+        return (results, hops)
+
+    def multi_delete(self, keys: Iterable[str]) -> tuple[int, int]:
+
+        groups, hops = self._group_by_owner(set(keys))
+        return (sum(owner.release_keys(owned) for owner, owned in groups.items()), hops)
+
     def join(self, introducer: Optional['PastryNode'] = None):
 
         if introducer is None:
@@ -204,8 +246,30 @@ class PastryNode:
             return
         
 
-        all_nodes = set()
-        to_visit = [introducer]
+        all_nodes = self._reachable_nodes(introducer)
+        
+        for node in all_nodes:
+            self.add_node(node)
+            node.add_node(self)
+        
+
+        transferred = {}
+        for node in all_nodes:
+            keys_to_transfer = []
+            for key_id, key, value in list(self._ring_entries(node.data)):
+                responsible, _ = self.route(key_id)
+                if responsible is self:
+                    keys_to_transfer.append((key, value))
+            
+            for key, value in keys_to_transfer:
+                transferred[key] = value
+                del node.data[key]
+        
+        self.data.bulk_load(sorted(transferred.items()))
+
+    def _reachable_nodes(self, start: 'PastryNode') -> List['PastryNode']:
+        nodes = []
+        to_visit = [start]
         visited = set()
         
         while to_visit:
@@ -213,38 +277,19 @@ class PastryNode:
             if current.id in visited:
                 continue
             visited.add(current.id)
-            all_nodes.add(current)
+            nodes.append(current)
             
-
             for node in current.get_leaf_set():
                 if node.id not in visited:
                     to_visit.append(node)
             for node in current.neighborhood_set:
                 if node.id not in visited:
                     to_visit.append(node)
-            for row in current.routing_table.values():
-                for node in row.values():
-                    if node.id not in visited:
-                        to_visit.append(node)
-        
-
-        for node in all_nodes:
-            self.add_node(node)
-            node.add_node(self)
+            for node in current.routing_table:
+                if node.id not in visited:
+                    to_visit.append(node)
         
-
-        for node in all_nodes:
-            keys_to_transfer = []
-            for key, value in list(node.data.items()):
-                key_id = self.hasher.hash_key(key)
-            
-                responsible, _ = self.route(key_id)
-                if responsible is self:
-                    keys_to_transfer.append((key, value))
-            
-            for key, value in keys_to_transfer:
-                self.data[key] = value
-                del node.data[key]
+        return nodes
 
     def leave(self, transfer_data: bool = True):
         if transfer_data:
@@ -253,52 +298,35 @@ class PastryNode:
             if all_nodes:
 
                 closest = min(all_nodes, key=lambda n: abs(n.id - self.id))
-                for key, value in self.data.items():
+                for key, value in self.data.iter_items():
                     closest.data[key] = value
         
 
         all_known_nodes = set(self.get_leaf_set() + self.neighborhood_set)
-        for row in self.routing_table.values():
-            all_known_nodes.update(row.values())
+        all_known_nodes.update(self.routing_table)
         
         for node in all_known_nodes:
             node._remove_node(self)
         
 
         self.data.clear()
-        self.leaf_smaller.clear()
-        self.leaf_larger.clear()
+        self.leaf_set.clear()
         self.neighborhood_set.clear()
         self.routing_table.clear()
 
     def _remove_node(self, leaving_node: 'PastryNode'):
 
-        if leaving_node in self.leaf_smaller:
-            self.leaf_smaller.remove(leaving_node)
-        if leaving_node in self.leaf_larger:
-            self.leaf_larger.remove(leaving_node)
+        self.leaf_set.remove(leaving_node)
         
         if leaving_node in self.neighborhood_set:
             self.neighborhood_set.remove(leaving_node)
         
-        for row_idx in list(self.routing_table.keys()):
-            for digit in list(self.routing_table[row_idx].keys()):
-                if self.routing_table[row_idx][digit] == leaving_node:
-                    del self.routing_table[row_idx][digit]
-            if not self.routing_table[row_idx]:
-                del self.routing_table[row_idx]
+        self.routing_table.remove(leaving_node)
     
     def check_leaf_set(self) -> List['PastryNode']:
         failed_nodes = []
         
-        for node in self.leaf_smaller:
-            try:
-                if not hasattr(node, 'id'):
-                    failed_nodes.append(node)
-            except Exception:
-                failed_nodes.append(node)
-        
-        for node in self.leaf_larger:
+        for node in self.get_leaf_set():
             try:
                 if not hasattr(node, 'id'):
                     failed_nodes.append(node)
@@ -309,32 +337,23 @@ class PastryNode:
     
     def repair_leaf_set(self, failed_nodes: List['PastryNode']):
         for node in failed_nodes:
-            if node in self.leaf_smaller:
-                self.leaf_smaller.remove(node)
-            if node in self.leaf_larger:
-                self.leaf_larger.remove(node)
+            self.leaf_set.remove(node)
     
     def check_routing_table(self) -> List['PastryNode']:
         failed_nodes = []
         
-        for row_idx in list(self.routing_table.keys()):
-            for digit in list(self.routing_table[row_idx].keys()):
-                node = self.routing_table[row_idx][digit]
-                try:
-                    if not hasattr(node, 'id'):
-                        failed_nodes.append(node)
-                except Exception:
+        for node in self.routing_table:
+            try:
+                if not hasattr(node, 'id'):
                     failed_nodes.append(node)
+            except Exception:
+                failed_nodes.append(node)
         
         return failed_nodes
     
     def repair_routing_table(self, failed_nodes: List['PastryNode']):
-        for row_idx in list(self.routing_table.keys()):
-            for digit in list(self.routing_table[row_idx].keys()):
-                if self.routing_table[row_idx][digit] in failed_nodes:
-                    del self.routing_table[row_idx][digit]
-            if not self.routing_table[row_idx]:
-                del self.routing_table[row_idx]
+        for node in failed_nodes:
+            self.routing_table.remove(node)
     
     def replicate_data(self):
         leaf_set = self.get_leaf_set()
@@ -344,20 +363,24 @@ class PastryNode:
         for node in leaf_set:
             try:
                 if hasattr(node, 'replicas'):
-                    for key, value in self.data.items():
+                    for key, value in self.data.iter_items():
                         node.replicas[key] = value
             except Exception:
                 continue
     
+    def _ring_entries(self, store) -> Iterable[tuple]:
+        if getattr(store, 'ring_index', None) is not None:
+            return store.iter_ring_range()
+        return ((self.hasher.hash_key(key), key, value) for key, value in store.items())
+
     def recover_data_from_replicas(self):
         leaf_set = self.get_leaf_set()
         
         for node in leaf_set:
             try:
                 if hasattr(node, 'data'):
-                    for key, value in node.data.items():
+                    for key_id, key, value in self._ring_entries(node.data):
                         if key not in self.data:
-                            key_id = self.hasher.hash_key(key)
                             responsible, _ = self.route(key_id)
                             if responsible is self:
                                 self.data[key] = value
@@ -367,26 +390,27 @@ class PastryNode:
         for node in leaf_set:
             try:
                 if hasattr(node, 'replicas'):
-                    for key, value in node.replicas.items():
+                    for key_id, key, value in self._ring_entries(node.replicas):
                         if key not in self.data:
-                            key_id = self.hasher.hash_key(key)
                             responsible, _ = self.route(key_id)
                             if responsible is self:
                                 self.data[key] = value
             except Exception:
                 continue
         
-        for key, value in list(self.replicas.items()):
+        for key_id, key, value in list(self.replicas.iter_ring_range()):
             if key not in self.data:
-                key_id = self.hasher.hash_key(key)
                 responsible, _ = self.route(key_id)
                 if responsible is self:
                     self.data[key] = value
                     del self.replicas[key]
 
     def local_range_query(self, attr_name: str, min_val, max_val):
+        if attr_name in self.data.indexes:
+            return list(self.data.iter_attribute_range(attr_name, min_val, max_val))
+        
         results = []
-        for key, value in self.data.items():
+        for value in self.data.iter_values():
             if isinstance(value, dict) and attr_name in value:
                 attr_val = value[attr_name]
                 if min_val <= attr_val <= max_val:
@@ -401,3 +425,11 @@ class PastryNode:
     
     def local_query_by_year(self, min_year: int, max_year: int):
         return self.local_range_query('year', min_year, max_year)
+    
+    def local_range_query_sorted(self, attr_name: str, min_val, max_val,
+                                 limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Any]:
+        return local_sorted_range(self, attr_name, min_val, max_val, limit, order_by)
+    
+    def distributed_range_query(self, attr_name: str, min_val, max_val, limit: Optional[int] = None,
+                                order_by: Optional[str] = None, max_workers: int = 10) -> List[Any]:
+        return fan_out_range_query(self._reachable_nodes(self), attr_name, min_val, max_val, limit, order_by, max_workers)
@@ -0,0 +1,69 @@
+from typing import Any, Iterator, List, Optional, Tuple
+
+
+class RoutingTable:
+    # num_rows x base cells in one flat list. Cell (row, digit) holds a node whose id shares `row`
+    # leading b-bit digits with the owner and has `digit` as its next digit.
+    
+    __slots__ = ('owner_id', 'm_bits', 'b', 'base', 'num_rows', 'cells', 'row_counts')
+    
+    def __init__(self, owner_id: int, m_bits: int, b: int):
+        self.owner_id = owner_id
+        self.m_bits = m_bits
+        self.b = b
+        self.base = 1 << b
+        self.num_rows = m_bits // b
+        self.cells: List[Optional[Any]] = [None] * (self.num_rows * self.base)
+        self.row_counts: List[int] = [0] * self.num_rows
+    
+    def __len__(self) -> int:
+        return sum(self.row_counts)
+    
+    def __iter__(self) -> Iterator[Any]:
+        return (node for node in self.cells if node is not None)
+    
+    def shared_prefix(self, id1: int, id2: int) -> int:
+        diff = id1 ^ id2
+        if not diff:
+            return self.num_rows
+        return min((self.m_bits - diff.bit_length()) // self.b, self.num_rows)
+    
+    def digit(self, node_id: int, row: int) -> int:
+        return (node_id >> (self.m_bits - self.b * (row + 1))) & (self.base - 1)
+    
+    def slot(self, node_id: int) -> Optional[Tuple[int, int]]:
+        row = self.shared_prefix(self.owner_id, node_id)
+        if row >= self.num_rows:
+            return None
+        return (row, self.digit(node_id, row))
+    
+    def get(self, row: int, digit: int) -> Optional[Any]:
+        return self.cells[row * self.base + digit]
+    
+    def put(self, row: int, digit: int, node: Any):
+        index = row * self.base + digit
+        if self.cells[index] is None:
+            self.row_counts[row] += 1
+        self.cells[index] = node
+    
+    def row(self, row: int) -> List[Optional[Any]]:
+        start = row * self.base
+        return self.cells[start:start + self.base]
+    
+    def entries(self) -> Iterator[Tuple[int, int, Any]]:
+        for index, node in enumerate(self.cells):
+            if node is not None:
+                yield (index // self.base, index % self.base, node)
+    
+    def remove(self, node: Any) -> int:
+        removed = 0
+        for index, current in enumerate(self.cells):
+            if current is not None and current == node:
+                self.cells[index] = None
+                self.row_counts[index // self.base] -= 1
+                removed += 1
+        return removed
+    
+    def clear(self):
+        self.cells = [None] * (self.num_rows * self.base)
+        self.row_counts = [0] * self.num_rows
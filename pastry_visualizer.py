@@ -50,13 +50,12 @@ class PastryVisualizer:
         if show_routing_table:
             for node in self.nodes:
                 start_pos = node_positions[node.id]
-                for row in node.routing_table.values():
-                    for rt_node in row.values():
-                        if rt_node.id in node_positions:
-                            end_pos = node_positions[rt_node.id]
-                            ax.plot([start_pos[0], end_pos[0]], 
-                                   [start_pos[1], end_pos[1]], 
-                                   color='#66bb6a', alpha=0.4, linewidth=1.2)
+                for rt_node in node.routing_table:
+                    if rt_node.id in node_positions:
+                        end_pos = node_positions[rt_node.id]
+                        ax.plot([start_pos[0], end_pos[0]], 
+                               [start_pos[1], end_pos[1]], 
+                               color='#66bb6a', alpha=0.4, linewidth=1.2)
         
         if show_leaf_set:
             for node in self.nodes:
@@ -127,8 +126,8 @@ class PastryVisualizer:
                 ax.text(x + cell_width/2, y - 0.1, f'{col:X}',
                        ha='center', va='top', fontsize=8, color='#9e9e9e')
                 
-                if row in node.routing_table and col in node.routing_table[row]:
-                    rt_node = node.routing_table[row][col]
+                rt_node = node.routing_table.get(row, col)
+                if rt_node is not None:
                     node_id_short = str(rt_node.id % 10000)
                     
                     rect.set_facecolor('#4caf50')
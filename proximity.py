@@ -0,0 +1,101 @@
+import hashlib
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class CoordinateLatencyModel:
+    # Simulated network: each address gets a fixed point on a unit square derived from its hash,
+    # and the RTT between two addresses (in ms) is a base cost plus their scaled distance.
+    
+    def __init__(self, base_rtt: float = 1.0, scale: float = 100.0, seed: int = 0):
+        self.base_rtt = base_rtt
+        self.scale = scale
+        self.seed = seed
+        self._positions: Dict[str, Tuple[float, float]] = {}
+    
+    def position(self, address: str) -> Tuple[float, float]:
+        position = self._positions.get(address)
+        if position is None:
+            digest = hashlib.sha1(f"{self.seed}:{address}".encode()).digest()
+            position = (
+                int.from_bytes(digest[:4], 'big') / 2 ** 32,
+                int.from_bytes(digest[4:8], 'big') / 2 ** 32
+            )
+            self._positions[address] = position
+        return position
+    
+    def rtt(self, source: str, target: str) -> float:
+        if source == target:
+            return 0.0
+        x1, y1 = self.position(source)
+        x2, y2 = self.position(target)
+        return self.base_rtt + self.scale * math.hypot(x1 - x2, y1 - y2)
+
+
+class MeasuredLatency:
+    # RTTs (in ms) measured with a ping callable on a background thread. rtt() never blocks: it returns
+    # the last smoothed sample (or unknown_rtt before the first one) and queues a probe when the sample
+    # is missing or older than max_age seconds.
+    
+    def __init__(self, ping: Callable[[str], bool], max_age: Optional[float] = 60.0, smoothing: float = 0.25,
+                 unknown_rtt: float = math.inf):
+        self.ping = ping
+        self.max_age = max_age
+        self.smoothing = smoothing
+        self.unknown_rtt = unknown_rtt
+        self._samples: Dict[str, Tuple[float, float]] = {}
+        self._queued: Dict[str, None] = {}
+        self._prober: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+    
+    def rtt(self, source: str, target: str) -> float:
+        if source == target:
+            return 0.0
+        
+        with self.lock:
+            sample = self._samples.get(target)
+            if sample is None or (self.max_age is not None and time.monotonic() - sample[1] >= self.max_age):
+                self._schedule(target)
+        return sample[0] if sample is not None else self.unknown_rtt
+    
+    def _schedule(self, target: str):
+        if target in self._queued:
+            return
+        self._queued[target] = None
+        if self._prober is None:
+            self._prober = threading.Thread(target=self._drain, daemon=True)
+            self._prober.start()
+    
+    def _drain(self):
+        while True:
+            with self.lock:
+                if not self._queued:
+                    self._prober = None
+                    return
+                target = next(iter(self._queued))
+            
+            try:
+                self.measure(target)
+            finally:
+                with self.lock:
+                    self._queued.pop(target, None)
+    
+    def measure(self, target: str) -> float:
+        started = time.perf_counter()
+        reachable = self.ping(target)
+        elapsed = (time.perf_counter() - started) * 1000
+        return self.observe(target, elapsed if reachable else math.inf)
+    
+    def observe(self, target: str, rtt_ms: float) -> float:
+        with self.lock:
+            sample = self._samples.get(target)
+            if sample is not None and math.isfinite(sample[0]) and math.isfinite(rtt_ms):
+                rtt_ms = sample[0] + self.smoothing * (rtt_ms - sample[0])
+            self._samples[target] = (rtt_ms, time.monotonic())
+        return rtt_ms
+    
+    def forget(self, target: str):
+        with self.lock:
+            self._samples.pop(target, None)
@@ -0,0 +1,169 @@
+import random
+
+import pytest
+
+from bplus_tree import BPlusTree
+
+
+def _leaves_in_order(node, depth, leaves, depths):
+    if node.is_leaf:
+        leaves.append(node)
+        depths.add(depth)
+        return
+    for child in node.children:
+        _leaves_in_order(child, depth + 1, leaves, depths)
+
+
+def _check_node(tree, node, low, high):
+    assert node.keys == sorted(node.keys)
+    assert len(set(node.keys)) == len(node.keys)
+    assert len(node.keys) <= tree.order - 2
+    if node is not tree.root:
+        assert len(node.keys) >= tree._min_keys(node)
+    for key in node.keys:
+        assert (low is None or low <= key) and (high is None or key < high)
+    
+    if node.is_leaf:
+        assert len(node.values) == len(node.keys)
+        return
+    
+    assert len(node.children) == len(node.keys) + 1
+    bounds = [low] + node.keys + [high]
+    for i, child in enumerate(node.children):
+        _check_node(tree, child, bounds[i], bounds[i + 1])
+
+
+def _check_tree(tree, model):
+    # Occupancy and separator bounds on every node, leaves all at one depth, and the next_leaf chain
+    # visiting exactly the leaves of an in-order walk, holding the model's keys in sorted order.
+    _check_node(tree, tree.root, None, None)
+    if not tree.root.is_leaf:
+        assert len(tree.root.children) >= 2
+    
+    leaves, depths = [], set()
+    _leaves_in_order(tree.root, 0, leaves, depths)
+    assert len(depths) == 1
+    
+    chain = []
+    node = tree._get_leftmost_leaf()
+    while node is not None:
+        chain.append(node)
+        node = node.next_leaf
+    assert chain == leaves
+    
+    assert tree.items() == sorted(model.items())
+    assert len(tree) == len(model)
+
+
+# Middle outwards borrows from right siblings; evens then odds from the top borrows from left ones.
+# Both merge all the way up to the root.
+DELETE_ORDERS = {
+    'middle_out': sorted(range(64), key=lambda key: (abs(key - 32), key)),
+    'evens_then_odds_descending': list(range(0, 64, 2)) + list(range(63, 0, -2))
+}
+
+
+@pytest.mark.parametrize("name", sorted(DELETE_ORDERS))
+def test_delete_borrows_and_merges_until_empty(name):
+    tree = BPlusTree(order=4)
+    model = {}
+    for key in range(64):
+        tree.insert(key, str(key))
+        model[key] = str(key)
+    assert tree.stats()['height'] > 2
+    
+    for key in DELETE_ORDERS[name]:
+        assert tree.delete(key)
+        del model[key]
+        _check_tree(tree, model)
+        assert tree.search(key) is None
+    
+    assert tree.root.is_leaf
+    assert not tree.delete(0)
+
+
+def test_random_upserts_and_deletes_match_dict():
+    rng = random.Random(4)
+    for order in (4, 5, 8):
+        tree = BPlusTree(order=order)
+        model = {}
+        for step in range(1500):
+            key = rng.randrange(300)
+            if rng.random() < 0.55:
+                assert tree.upsert(key, step) == (key not in model)
+                model[key] = step
+            else:
+                assert tree.delete(key) == (key in model)
+                model.pop(key, None)
+            _check_tree(tree, model)
+        
+        for key in range(300):
+            assert tree.get(key) == model.get(key)
+
+
+def test_bulk_load_and_from_sorted():
+    rng = random.Random(7)
+    for order in (4, 5, 10):
+        for size in (0, 1, order - 2, order - 1, 3 * order + 1, 500):
+            model = {key: key * 2 for key in rng.sample(range(5000), size)}
+            tree = BPlusTree.from_sorted(sorted(model.items()), order=order)
+            _check_tree(tree, model)
+            
+            for key in rng.sample(range(5000), 50):
+                tree.upsert(key, -key)
+                model[key] = -key
+                _check_tree(tree, model)
+            for key in rng.sample(sorted(model), min(len(model), 80)):
+                tree.delete(key)
+                del model[key]
+                _check_tree(tree, model)
+    
+    tree = BPlusTree.from_sorted([(k, k) for k in range(0, 100, 2)], order=6)
+    tree.bulk_load([(k, -k) for k in range(0, 100, 5)])
+    model = {k: k for k in range(0, 100, 2)}
+    model.update((k, -k) for k in range(0, 100, 5))
+    _check_tree(tree, model)
+    
+    with pytest.raises(ValueError):
+        BPlusTree.from_sorted([(2, 'b'), (1, 'a')])
+    with pytest.raises(ValueError):
+        BPlusTree.from_sorted([(1, 'a'), (1, 'b')])
+
+
+def test_iter_items_reverse_offset_limit_match_sorted_model():
+    rng = random.Random(11)
+    tree = BPlusTree(order=5)
+    model = {}
+    for key in rng.sample(range(1000), 400):
+        tree.insert(key, key + 0.5)
+        model[key] = key + 0.5
+    for key in rng.sample(sorted(model), 150):
+        tree.delete(key)
+        del model[key]
+    
+    ordered = sorted(model.items())
+    for _ in range(200):
+        start = rng.choice([None, rng.randrange(-10, 1010)])
+        end = rng.choice([None, rng.randrange(-10, 1010)])
+        offset = rng.randrange(0, 30)
+        limit = rng.choice([None, 0, 1, rng.randrange(0, 60)])
+        
+        window = [(k, v) for k, v in ordered if (start is None or k >= start) and (end is None or k <= end)]
+        
+        forward = list(tree.iter_items(start, end, limit=limit, offset=offset))
+        assert forward == window[offset:None if limit is None else offset + limit]
+        
+        backward = list(tree.iter_items(start, end, reverse=True, limit=limit, offset=offset))
+        assert backward == window[::-1][offset:None if limit is None else offset + limit]
+    
+    assert list(tree.iter_keys(reverse=True)) == sorted(model, reverse=True)
+    with pytest.raises(ValueError):
+        tree.iter_items(offset=-1)
+
+
+if __name__ == "__main__":
+    for name in DELETE_ORDERS:
+        test_delete_borrows_and_merges_until_empty(name)
+    test_random_upserts_and_deletes_match_dict()
+    test_bulk_load_and_from_sorted()
+    test_iter_items_reverse_offset_limit_match_sorted_model()
@@ -0,0 +1,76 @@
+from message_protocol import MessageType, create_busy_response, create_request, create_response
+from wire_codec import BINARY_CODEC, _TYPE_CODES
+
+
+# Frames on the wire carry these codes; changing one breaks mixed-version clusters.
+EXPECTED_TYPE_CODES = {
+    'find_successor': 0,
+    'closest_preceding_node': 1,
+    'get_predecessor': 2,
+    'get_successor': 3,
+    'notify': 4,
+    'stabilize': 5,
+    'fix_fingers': 6,
+    'update_finger_table': 7,
+    'route': 8,
+    'add_node': 9,
+    'get_leaf_set': 10,
+    'update_routing_table': 11,
+    'insert': 12,
+    'lookup': 13,
+    'delete': 14,
+    'update': 15,
+    'join': 16,
+    'leave': 17,
+    'transfer_keys': 18,
+    'get_keys_for_range': 19,
+    'ping': 20,
+    'get_node_info': 21,
+    'get_data': 22,
+    'get_successor_list': 23,
+    'get_replicas': 24,
+    'check_predecessor': 25,
+    'range_query': 26,
+    'distributed_range_query': 27,
+    'response': 28,
+    'busy': 29,
+    'error': 30,
+    'release_keys': 31,
+    'fetch_keys': 32,
+    'multi_insert': 33,
+    'multi_lookup': 34,
+    'multi_delete': 35,
+    'fetch_versioned': 36,
+    'find_successor_step': 37
+}
+
+
+def test_type_codes_are_frozen():
+    assert {msg_type.value: code for msg_type, code in _TYPE_CODES.items()} == EXPECTED_TYPE_CODES
+
+
+def test_every_message_type_has_a_unique_code():
+    assert set(_TYPE_CODES) == set(MessageType)
+    assert len(set(_TYPE_CODES.values())) == len(_TYPE_CODES)
+
+
+def test_binary_round_trip_keeps_message_type():
+    request = create_request(MessageType.FETCH_VERSIONED, "127.0.0.1:5000", "127.0.0.1:5001", ["key"], known={"key": 3})
+    decoded = BINARY_CODEC.decode(BINARY_CODEC.encode(request))
+    assert decoded.msg_type == MessageType.FETCH_VERSIONED
+    assert decoded.args == [["key"]]
+    assert decoded.kwargs == {"known": {"key": 3}}
+    
+    response = BINARY_CODEC.decode(BINARY_CODEC.encode(create_response(request, result=[1, 2])))
+    assert response.msg_type == MessageType.RESPONSE
+    assert response.result == [1, 2]
+    
+    busy = BINARY_CODEC.decode(BINARY_CODEC.encode(create_busy_response(request)))
+    assert busy.msg_type == MessageType.BUSY
+    assert not busy.success
+
+
+if __name__ == "__main__":
+    test_type_codes_are_frozen()
+    test_every_message_type_has_a_unique_code()
+    test_binary_round_trip_keeps_message_type()
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+CACHE_POLICIES = ('lru', 'lfu')
+
+
+class ValueCache:
+    # Bounded LOOKUP result cache. Each entry remembers the owner that served it and the version the
+    # owner's store stamped on the record. For fresh_for seconds after the owner last confirmed an
+    # entry it is served without contacting anyone (a hit). After that a read revalidates it with one
+    # fetch_versioned() call to the owner, which only sends back records whose version moved on, so
+    # writes made through any node are seen once an entry is older than fresh_for. An unchanged record
+    # counts as a revalidation, not a hit: it saved the routing hops but not the round trip. The TTL
+    # bounds how long an owner is trusted before re-routing.
+    
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 30.0, policy: str = 'lru',
+                 metrics: Any = None, fresh_for: float = 0.0):
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy {policy!r}; expected one of {CACHE_POLICIES}")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.policy = policy
+        self.metrics = metrics
+        self.fresh_for = fresh_for
+        
+        # Entries are [value, owner, version, expires, freq, validated_at].
+        self._entries: OrderedDict = OrderedDict()
+        # LFU only: keys grouped by use count, oldest first, so eviction never scans the cache.
+        self._buckets: Dict[int, OrderedDict] = {}
+        self._min_freq = 0
+        self.lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _live_entry(self, key: str) -> Optional[list]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[3] is not None and entry[3] < time.monotonic():
+            self._drop(key)
+            return None
+        return entry
+    
+    def put(self, key: str, value: Any, owner: Any, version: int):
+        with self.lock:
+            now = time.monotonic()
+            expires = now + self.ttl if self.ttl is not None else None
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] is owner and entry[2] > version:
+                    return
+                entry[0], entry[1], entry[2], entry[3], entry[5] = value, owner, version, expires, now
+                self._entries.move_to_end(key)
+                return
+            
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[key] = [value, owner, version, expires, 1, now]
+            if self.policy == 'lfu':
+                self._buckets.setdefault(1, OrderedDict())[key] = None
+                self._min_freq = 1
+    
+    def fetch(self, key: str, group: Callable[[List[str]], Dict[Any, List[str]]]) -> Any:
+        return self.fetch_many([key], group).get(key)
+    
+    def fetch_many(self, keys: Iterable[str], group: Callable[[List[str]], Dict[Any, List[str]]]) -> Dict[str, Any]:
+        # group(keys) routes keys to their owners ({owner: [keys]}); it is only called for keys that
+        # are not cached or whose cached owner no longer holds them.
+        results = {}
+        fresh = []
+        stale: Dict[Any, Dict[str, Tuple[Any, int]]] = {}
+        missing = []
+        with self.lock:
+            now = time.monotonic()
+            for key in keys:
+                entry = self._live_entry(key)
+                if entry is None:
+                    missing.append(key)
+                elif now - entry[5] < self.fresh_for:
+                    results[key] = entry[0]
+                    fresh.append(key)
+                else:
+                    stale.setdefault(entry[1], {})[key] = (entry[0], entry[2])
+        
+        for key in fresh:
+            self._record_use(key, revalidated=False)
+        
+        for owner, entries in stale.items():
+            known = {key: version for key, (_, version) in entries.items()}
+            try:
+                changed = owner.fetch_versioned(list(known), known)
+            except Exception:
+                missing.extend(known)
+                continue
+            
+            for key, (value, _) in entries.items():
+                if key not in changed:
+                    results[key] = value
+                    self._record_use(key, revalidated=True)
+                elif changed[key] is not None:
+                    results[key], version = changed[key]
+                    self.put(key, results[key], owner, version)
+                    self._record_miss()
+                else:
+                    missing.append(key)
+        
+        if missing:
+            for _ in missing:
+                self._record_miss()
+            for owner, owned in group(missing).items():
+                records = owner.fetch_versioned(owned)
+                for key in owned:
+                    record = records.get(key)
+                    if record is None:
+                        results[key] = None
+                        with self.lock:
+                            self._drop(key)
+                    else:
+                        results[key] = record[0]
+                        self.put(key, record[0], owner, record[1])
+        return results
+    
+    def _record_use(self, key: str, revalidated: bool):
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if revalidated:
+                    entry[5] = time.monotonic()
+                self._touch(key, entry)
+            if revalidated:
+                self.revalidations += 1
+            else:
+                self.hits += 1
+        
+        if self.metrics:
+            if revalidated:
+                self.metrics.record_cache_revalidation()
+            else:
+                self.metrics.record_cache_lookup(hit=True)
+    
+    def _record_miss(self):
+        with self.lock:
+            self.misses += 1
+        if self.metrics:
+            self.metrics.record_cache_lookup(hit=False)
+    
+    def _touch(self, key: str, entry: list):
+        self._entries.move_to_end(key)
+        if self.policy == 'lfu':
+            freq = entry[4]
+            bucket = self._buckets[freq]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[freq]
+                if self._min_freq == freq:
+                    self._min_freq = freq + 1
+            entry[4] = freq + 1
+            self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+    
+    def _drop(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        if self.policy == 'lfu':
+            bucket = self._buckets[entry[4]]
+            del bucket[key]
+            if not bucket:
+                del self._buckets[entry[4]]
+        return True
+    
+    def _evict(self):
+        if self.policy == 'lfu':
+            # Drops and invalidations can empty the lowest bucket without moving _min_freq.
+            if self._min_freq not in self._buckets:
+                self._min_freq = min(self._buckets)
+            victim = next(iter(self._buckets[self._min_freq]))
+        else:
+            victim = next(iter(self._entries))
+        self._drop(victim)
+        self.evictions += 1
+    
+    def invalidate(self, key: str):
+        self.invalidate_many((key,))
+    
+    def invalidate_many(self, keys: Iterable[str]):
+        # Dropping entries for local writes only saves a revalidation round trip; correctness comes
+        # from the version check.
+        count = 0
+        with self.lock:
+            for key in keys:
+                if self._drop(key):
+                    count += 1
+            self.invalidations += count
+        
+        if self.metrics and count:
+            self.metrics.record_cache_invalidation(count)
+    
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._min_freq = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.revalidations + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / total if total else 0.0
+        }
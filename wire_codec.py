@@ -0,0 +1,480 @@
+import json
+import lzma
+import struct
+import zlib
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from message_protocol import Message, RequestMessage, ResponseMessage, MessageType
+
+
+_FRAME_LENGTH = struct.Struct('!I')
+
+BINARY_MAGIC = 0xB1
+
+_HEADER = struct.Struct('!BBBQd')
+
+COMPRESSED_MAGIC = 0xC5
+
+_COMPRESSION_HEADER = struct.Struct('!BBI')
+
+_FLAG_INT_REQUEST_ID = 0x01
+_FLAG_REQUEST = 0x02
+_FLAG_RESPONSE = 0x04
+_FLAG_SUCCESS = 0x08
+_FLAG_CUSTOM_TYPE = 0x10
+
+_CUSTOM_TYPE_CODE = 0xFF
+# Wire codes are part of the protocol: never renumber an entry, only append new types with new codes.
+# Types missing here still travel, as _CUSTOM_TYPE_CODE followed by their string value.
+_TYPE_CODES: Dict[MessageType, int] = {
+    MessageType.FIND_SUCCESSOR: 0,
+    MessageType.CLOSEST_PRECEDING_NODE: 1,
+    MessageType.GET_PREDECESSOR: 2,
+    MessageType.GET_SUCCESSOR: 3,
+    MessageType.NOTIFY: 4,
+    MessageType.STABILIZE: 5,
+    MessageType.FIX_FINGERS: 6,
+    MessageType.UPDATE_FINGER_TABLE: 7,
+    MessageType.ROUTE: 8,
+    MessageType.ADD_NODE: 9,
+    MessageType.GET_LEAF_SET: 10,
+    MessageType.UPDATE_ROUTING_TABLE: 11,
+    MessageType.INSERT: 12,
+    MessageType.LOOKUP: 13,
+    MessageType.DELETE: 14,
+    MessageType.UPDATE: 15,
+    MessageType.JOIN: 16,
+    MessageType.LEAVE: 17,
+    MessageType.TRANSFER_KEYS: 18,
+    MessageType.GET_KEYS_FOR_RANGE: 19,
+    MessageType.PING: 20,
+    MessageType.GET_NODE_INFO: 21,
+    MessageType.GET_DATA: 22,
+    MessageType.GET_SUCCESSOR_LIST: 23,
+    MessageType.GET_REPLICAS: 24,
+    MessageType.CHECK_PREDECESSOR: 25,
+    MessageType.RANGE_QUERY: 26,
+    MessageType.DISTRIBUTED_RANGE_QUERY: 27,
+    MessageType.RESPONSE: 28,
+    MessageType.BUSY: 29,
+    MessageType.ERROR: 30,
+    MessageType.RELEASE_KEYS: 31,
+    MessageType.FETCH_KEYS: 32,
+    MessageType.MULTI_INSERT: 33,
+    MessageType.MULTI_LOOKUP: 34,
+    MessageType.MULTI_DELETE: 35,
+    MessageType.FETCH_VERSIONED: 36,
+    MessageType.FIND_SUCCESSOR_STEP: 37
+}
+_TYPES_BY_CODE: Dict[int, MessageType] = {code: msg_type for msg_type, code in _TYPE_CODES.items()}
+
+_ID_BYTES = 20
+_MAX_UINT64 = (1 << 64) - 1
+
+_NIL = 0xc0
+_FALSE = 0xc2
+_TRUE = 0xc3
+_BIN32 = 0xc6
+_ID160 = 0xc7
+_BIGINT = 0xc8
+_FLOAT64 = 0xcb
+_UINT8 = 0xcc
+_UINT16 = 0xcd
+_UINT32 = 0xce
+_UINT64 = 0xcf
+_INT64 = 0xd3
+_STR8 = 0xd9
+_STR16 = 0xda
+_STR32 = 0xdb
+_ARRAY16 = 0xdc
+_ARRAY32 = 0xdd
+_MAP16 = 0xde
+_MAP32 = 0xdf
+
+_B = struct.Struct('!B')
+_H = struct.Struct('!H')
+_I = struct.Struct('!I')
+_Q = struct.Struct('!Q')
+_q = struct.Struct('!q')
+_d = struct.Struct('!d')
+
+
+def _json_key(key: Any) -> str:
+    # Mirror json.dumps, which turns int/float/bool/None keys into strings.
+    return key if isinstance(key, str) else json.dumps(key)
+
+
+def _pack(obj: Any, out: List[bytes]):
+    obj_type = type(obj)
+    
+    if obj is None:
+        out.append(b'\xc0')
+    elif obj_type is bool:
+        out.append(b'\xc3' if obj else b'\xc2')
+    elif obj_type is int:
+        if 0 <= obj < 0x80:
+            out.append(_B.pack(obj))
+        elif -32 <= obj < 0:
+            out.append(_B.pack(obj & 0xff))
+        elif 0 <= obj <= 0xff:
+            out.append(b'\xcc' + _B.pack(obj))
+        elif 0 <= obj <= 0xffff:
+            out.append(b'\xcd' + _H.pack(obj))
+        elif 0 <= obj <= 0xffffffff:
+            out.append(b'\xce' + _I.pack(obj))
+        elif 0 <= obj <= _MAX_UINT64:
+            out.append(b'\xcf' + _Q.pack(obj))
+        elif -(1 << 63) <= obj < 0:
+            out.append(b'\xd3' + _q.pack(obj))
+        elif 0 < obj < (1 << (8 * _ID_BYTES)):
+            out.append(b'\xc7' + obj.to_bytes(_ID_BYTES, 'big'))
+        else:
+            magnitude = abs(obj)
+            data = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, 'big')
+            out.append(b'\xc8' + _H.pack(len(data)) + (b'\x01' if obj < 0 else b'\x00') + data)
+    elif obj_type is float:
+        out.append(b'\xcb' + _d.pack(obj))
+    elif obj_type is str:
+        data = obj.encode('utf-8')
+        length = len(data)
+        if length < 32:
+            out.append(_B.pack(0xa0 | length))
+        elif length <= 0xff:
+            out.append(b'\xd9' + _B.pack(length))
+        elif length <= 0xffff:
+            out.append(b'\xda' + _H.pack(length))
+        else:
+            out.append(b'\xdb' + _I.pack(length))
+        out.append(data)
+    elif obj_type is dict:
+        length = len(obj)
+        if length < 16:
+            out.append(_B.pack(0x80 | length))
+        elif length <= 0xffff:
+            out.append(b'\xde' + _H.pack(length))
+        else:
+            out.append(b'\xdf' + _I.pack(length))
+        for key, value in obj.items():
+            _pack(_json_key(key), out)
+            _pack(value, out)
+    elif obj_type is list or obj_type is tuple:
+        length = len(obj)
+        if length < 16:
+            out.append(_B.pack(0x90 | length))
+        elif length <= 0xffff:
+            out.append(b'\xdc' + _H.pack(length))
+        else:
+            out.append(b'\xdd' + _I.pack(length))
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        out.append(b'\xc6' + _I.pack(len(obj)))
+        out.append(bytes(obj))
+    elif isinstance(obj, bool):
+        out.append(b'\xc3' if obj else b'\xc2')
+    elif isinstance(obj, int):
+        _pack(int(obj), out)
+    elif isinstance(obj, float):
+        _pack(float(obj), out)
+    elif isinstance(obj, str):
+        _pack(str(obj), out)
+    elif isinstance(obj, dict):
+        _pack(dict(obj), out)
+    elif isinstance(obj, (list, tuple)):
+        _pack(list(obj), out)
+    else:
+        raise TypeError(f"Object of type {obj_type.__name__} is not serializable by the binary codec")
+
+
+def _unpack(data: bytes, pos: int) -> Tuple[Any, int]:
+    tag = data[pos]
+    pos += 1
+    
+    if tag < 0x80:
+        return tag, pos
+    if tag >= 0xe0:
+        return tag - 0x100, pos
+    if tag >= 0xa0 and tag <= 0xbf:
+        end = pos + (tag & 0x1f)
+        return data[pos:end].decode('utf-8'), end
+    if tag >= 0x90 and tag <= 0x9f:
+        return _unpack_array(data, pos, tag & 0x0f)
+    if tag <= 0x8f:
+        return _unpack_map(data, pos, tag & 0x0f)
+    
+    reader = _TAG_READERS.get(tag)
+    if reader is None:
+        raise ValueError(f"Unknown binary codec tag 0x{tag:02x} at offset {pos - 1}")
+    return reader(data, pos)
+
+
+def _unpack_array(data: bytes, pos: int, length: int) -> Tuple[List[Any], int]:
+    items = []
+    for _ in range(length):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, length: int) -> Tuple[Dict[str, Any], int]:
+    result = {}
+    for _ in range(length):
+        tag = data[pos]
+        if 0xa0 <= tag <= 0xbf:
+            end = pos + 1 + (tag & 0x1f)
+            key = data[pos + 1:end].decode('utf-8')
+            pos = end
+        else:
+            key, pos = _unpack(data, pos)
+        value, pos = _unpack(data, pos)
+        result[key] = value
+    return result, pos
+
+
+def _read_str(data: bytes, pos: int, length_struct: struct.Struct) -> Tuple[str, int]:
+    start = pos + length_struct.size
+    end = start + length_struct.unpack_from(data, pos)[0]
+    return data[start:end].decode('utf-8'), end
+
+
+def _read_bigint(data: bytes, pos: int) -> Tuple[int, int]:
+    start = pos + 3
+    end = start + _H.unpack_from(data, pos)[0]
+    value = int.from_bytes(data[start:end], 'big')
+    return (-value if data[pos + 2] else value), end
+
+
+def _read_bin(data: bytes, pos: int) -> Tuple[bytes, int]:
+    start = pos + 4
+    end = start + _I.unpack_from(data, pos)[0]
+    return data[start:end], end
+
+
+_TAG_READERS = {
+    _NIL: lambda data, pos: (None, pos),
+    _FALSE: lambda data, pos: (False, pos),
+    _TRUE: lambda data, pos: (True, pos),
+    _UINT8: lambda data, pos: (data[pos], pos + 1),
+    _UINT16: lambda data, pos: (_H.unpack_from(data, pos)[0], pos + 2),
+    _UINT32: lambda data, pos: (_I.unpack_from(data, pos)[0], pos + 4),
+    _UINT64: lambda data, pos: (_Q.unpack_from(data, pos)[0], pos + 8),
+    _INT64: lambda data, pos: (_q.unpack_from(data, pos)[0], pos + 8),
+    _ID160: lambda data, pos: (int.from_bytes(data[pos:pos + _ID_BYTES], 'big'), pos + _ID_BYTES),
+    _BIGINT: _read_bigint,
+    _FLOAT64: lambda data, pos: (_d.unpack_from(data, pos)[0], pos + 8),
+    _STR8: lambda data, pos: _read_str(data, pos, _B),
+    _STR16: lambda data, pos: _read_str(data, pos, _H),
+    _STR32: lambda data, pos: _read_str(data, pos, _I),
+    _BIN32: _read_bin,
+    _ARRAY16: lambda data, pos: _unpack_array(data, pos + 2, _H.unpack_from(data, pos)[0]),
+    _ARRAY32: lambda data, pos: _unpack_array(data, pos + 4, _I.unpack_from(data, pos)[0]),
+    _MAP16: lambda data, pos: _unpack_map(data, pos + 2, _H.unpack_from(data, pos)[0]),
+    _MAP32: lambda data, pos: _unpack_map(data, pos + 4, _I.unpack_from(data, pos)[0]),
+}
+
+
+def pack_value(obj: Any) -> bytes:
+    out: List[bytes] = []
+    _pack(obj, out)
+    return b''.join(out)
+
+
+def unpack_value(data: Union[bytes, bytearray, memoryview]) -> Any:
+    data = bytes(data)
+    value, pos = _unpack(data, 0)
+    if pos != len(data):
+        raise ValueError(f"Trailing data after binary value ({len(data) - pos} bytes)")
+    return value
+
+
+class JsonCodec:
+    name = "json"
+    
+    def encode(self, message: Message) -> bytes:
+        return message.to_json().encode('utf-8')
+    
+    def decode(self, data: Union[bytes, bytearray, memoryview]) -> Message:
+        return Message.from_json(str(data, 'utf-8'))
+
+
+class BinaryCodec:
+    name = "binary"
+    
+    def encode(self, message: Message) -> bytes:
+        msg_type = message.msg_type
+        flags = 0
+        
+        type_code = _TYPE_CODES.get(msg_type, _CUSTOM_TYPE_CODE) if isinstance(msg_type, MessageType) else _CUSTOM_TYPE_CODE
+        if type_code == _CUSTOM_TYPE_CODE:
+            flags |= _FLAG_CUSTOM_TYPE
+        
+        request_id = message.request_id
+        if type(request_id) is int and 0 <= request_id <= _MAX_UINT64:
+            flags |= _FLAG_INT_REQUEST_ID
+            header_id = request_id
+        else:
+            header_id = 0
+        
+        if isinstance(message, ResponseMessage):
+            flags |= _FLAG_RESPONSE
+            if message.success:
+                flags |= _FLAG_SUCCESS
+        elif isinstance(message, RequestMessage):
+            flags |= _FLAG_REQUEST
+        
+        out: List[bytes] = [_HEADER.pack(BINARY_MAGIC, type_code, flags, header_id, message.timestamp)]
+        if flags & _FLAG_CUSTOM_TYPE:
+            _pack(msg_type.value if isinstance(msg_type, MessageType) else str(msg_type), out)
+        if not flags & _FLAG_INT_REQUEST_ID:
+            _pack(request_id, out)
+        _pack(message.sender_address, out)
+        _pack(message.receiver_address, out)
+        
+        if flags & _FLAG_RESPONSE:
+            _pack(message.result, out)
+            _pack(message.error, out)
+        elif flags & _FLAG_REQUEST:
+            _pack(message.args, out)
+            _pack(message.kwargs, out)
+        else:
+            _pack(message.payload, out)
+        
+        return b''.join(out)
+    
+    def decode(self, data: Union[bytes, bytearray, memoryview]) -> Message:
+        data = bytes(data)
+        magic, type_code, flags, header_id, timestamp = _HEADER.unpack_from(data, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"Not a binary codec frame (magic 0x{magic:02x})")
+        pos = _HEADER.size
+        
+        if flags & _FLAG_CUSTOM_TYPE:
+            type_name, pos = _unpack(data, pos)
+            try:
+                msg_type = MessageType(type_name)
+            except ValueError:
+                msg_type = type_name
+        else:
+            msg_type = _TYPES_BY_CODE[type_code]
+        
+        if flags & _FLAG_INT_REQUEST_ID:
+            request_id = header_id
+        else:
+            request_id, pos = _unpack(data, pos)
+        sender_address, pos = _unpack(data, pos)
+        receiver_address, pos = _unpack(data, pos)
+        
+        if flags & _FLAG_RESPONSE:
+            result, pos = _unpack(data, pos)
+            error, pos = _unpack(data, pos)
+            message = ResponseMessage(
+                sender_address=sender_address,
+                receiver_address=receiver_address,
+                request_id=request_id,
+                result=result,
+                success=bool(flags & _FLAG_SUCCESS),
+                error=error,
+                msg_type=msg_type
+            )
+        elif flags & _FLAG_REQUEST:
+            args, pos = _unpack(data, pos)
+            kwargs, pos = _unpack(data, pos)
+            message = RequestMessage(
+                operation=msg_type,
+                sender_address=sender_address,
+                receiver_address=receiver_address,
+                args=args,
+                kwargs=kwargs,
+                request_id=request_id
+            )
+        else:
+            payload, pos = _unpack(data, pos)
+            message = Message(
+                msg_type=msg_type,
+                sender_address=sender_address,
+                receiver_address=receiver_address,
+                request_id=request_id,
+                payload=payload
+            )
+        
+        message.timestamp = timestamp
+        return message
+
+
+JSON_CODEC = JsonCodec()
+BINARY_CODEC = BinaryCodec()
+
+Codec = Union[JsonCodec, BinaryCodec]
+
+CODECS = {
+    JSON_CODEC.name: JSON_CODEC,
+    BINARY_CODEC.name: BINARY_CODEC
+}
+
+
+def get_codec(name: str) -> Codec:
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec '{name}', expected one of {sorted(CODECS)}")
+
+
+def codec_for_body(data: Union[bytes, bytearray, memoryview]) -> Codec:
+    # JSON bodies always start with '{', so the first byte identifies the codec.
+    return BINARY_CODEC if len(data) and data[0] == BINARY_MAGIC else JSON_CODEC
+
+
+# name -> (id written in the envelope, compress, decompressor factory)
+COMPRESSORS = {
+    'zlib': (1, lambda data: zlib.compress(data, 6), zlib.decompressobj),
+    'lzma': (2, lambda data: lzma.compress(data, preset=1), lzma.LZMADecompressor),
+}
+
+_DECOMPRESSORS = {algorithm_id: factory for algorithm_id, _, factory in COMPRESSORS.values()}
+
+
+def check_compression(name: Optional[str]) -> Optional[str]:
+    if name is not None and name not in COMPRESSORS:
+        raise ValueError(f"Unknown compression '{name}', expected one of {sorted(COMPRESSORS)}")
+    return name
+
+
+def is_compressed(data: Union[bytes, bytearray, memoryview]) -> bool:
+    return len(data) > 0 and data[0] == COMPRESSED_MAGIC
+
+
+def compress_body(body: bytes, algorithm: str) -> bytes:
+    algorithm_id, compress, _ = COMPRESSORS[algorithm]
+    return _COMPRESSION_HEADER.pack(COMPRESSED_MAGIC, algorithm_id, len(body)) + compress(body)
+
+
+def decompress_body(data: Union[bytes, bytearray, memoryview], max_size: Optional[int] = None) -> bytes:
+    _, algorithm_id, original_size = _COMPRESSION_HEADER.unpack_from(data, 0)
+    if max_size is not None and original_size > max_size:
+        raise ValueError(f"Compressed frame expands to {original_size} bytes, over the {max_size} byte limit")
+    
+    factory = _DECOMPRESSORS.get(algorithm_id)
+    if factory is None:
+        raise ValueError(f"Unknown compression algorithm id {algorithm_id}")
+    
+    # Bound the output by the declared size so a corrupt or hostile frame cannot balloon.
+    decompressor = factory()
+    body = decompressor.decompress(bytes(data[_COMPRESSION_HEADER.size:]), original_size)
+    if len(body) != original_size or not decompressor.eof:
+        raise ValueError(f"Compressed frame does not expand to its declared {original_size} bytes")
+    return body
+
+
+def frame_body(body: bytes) -> bytes:
+    return _FRAME_LENGTH.pack(len(body)) + body
+
+
+def encode_frame(message: Message, codec: Optional[Codec] = None) -> bytes:
+    return frame_body((codec or JSON_CODEC).encode(message))
+
+
+def decode_body(data: Union[bytes, bytearray, memoryview], max_size: Optional[int] = None) -> Tuple[Message, Codec]:
+    if is_compressed(data):
+        data = decompress_body(data, max_size)
+    codec = codec_for_body(data)
+    return codec.decode(data), codec